@@ -1,7 +1,56 @@
 from langchain_core.tools import Tool
-from .base_agent import get_llm, create_base_agent
-from typing import Dict, List
+from .base_agent import (
+    get_llm,
+    create_base_agent,
+    chunk_transactions,
+    merge_agent_results,
+    to_prompt_json,
+    MAX_CONCURRENCY,
+)
+from data.sample_sanctions import (
+    SAMPLE_SANCTIONS,
+    SANCTION_INDEX,
+    JURISDICTION_CODE_TO_RISK,
+    JURISDICTION_NAME_TO_RISK,
+)
+from typing import Dict, List, Optional
+import asyncio
 import json
+import re
+
+
+def _compile_alternation(terms, word_bounded: bool = False):
+    """Compile terms into one regex alternation, longest terms first."""
+    body = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"\b(?:{body})\b" if word_bounded else body)
+
+
+# Terms screened for inside entity names: every listed name and alias, plus
+# the short "XYZ Holdings" form of SDN-003 the demo screen has always matched
+_SANCTIONS_TERMS = {**SANCTION_INDEX, "xyz holdings": SANCTION_INDEX["xyz holdings international"]}
+
+# One word-bounded scan over an entity name finds any of those terms, so an
+# alias like "OT Limited" does not match inside "Pilot Limited"
+_SANCTIONS_PATTERN = _compile_alternation(_SANCTIONS_TERMS, word_bounded=True)
+
+
+def screen_sanctions(text: str) -> Optional[int]:
+    """
+    Screen free text against the sample sanctions list.
+    Returns the SAMPLE_SANCTIONS index of the first listed name or alias
+    found in text as whole words, or None.
+    """
+    match = _SANCTIONS_PATTERN.search(text.lower())
+    return _SANCTIONS_TERMS[match.group(0)] if match else None
+
+# One word-bounded pattern per risk tier for jurisdictions given as free text
+_JURISDICTION_PATTERNS = {
+    level: _compile_alternation(
+        [name for name, risk in JURISDICTION_NAME_TO_RISK.items() if risk == level],
+        word_bounded=True
+    )
+    for level in set(JURISDICTION_NAME_TO_RISK.values())
+}
 
 
 class LegalAgent:
@@ -27,7 +76,13 @@ class LegalAgent:
         self.sanctions_searcher = sanctions_searcher
         self.policy_searcher = policy_searcher
         self.tools = self._create_tools()
-        self.agent = create_base_agent(self.llm, self.tools, self.SYSTEM_PROMPT)
+        # Tools close over the injected searchers, so only share the compiled
+        # graph between instances using the same searchers
+        self.agent = create_base_agent(
+            self.llm, self.tools, self.SYSTEM_PROMPT,
+            cache_key=(tuple(t.name for t in self.tools),
+                       id(self.sanctions_searcher), id(self.policy_searcher))
+        )
     
     def _create_tools(self) -> List[Tool]:
         """Create tools for the legal agent."""
@@ -58,22 +113,31 @@ class LegalAgent:
         """Check if an entity is on sanctions lists."""
         if self.sanctions_searcher:
             results = self.sanctions_searcher.search(entity)
-            return json.dumps(results)
+            return to_prompt_json(results)
         
-        # Mock response for demo
-        high_risk_entities = ["acme shell corporation", "xyz holdings", "offshore trust ltd"]
-        entity_lower = entity.lower()
+        # Mock response for demo: exact names and aliases resolve with one hash
+        # lookup; otherwise one scan finds any listed term inside the entity
+        entity_lower = entity.strip().lower()
+        index = SANCTION_INDEX.get(entity_lower)
+        match_type = "EXACT"
+        if index is None:
+            index = screen_sanctions(entity_lower)
+            match_type = "PARTIAL"
         
-        if any(risk in entity_lower for risk in high_risk_entities):
-            return json.dumps({
+        if index is not None:
+            record = SAMPLE_SANCTIONS[index]
+            return to_prompt_json({
                 "match_found": True,
                 "entity": entity,
-                "list": "OFAC SDN",
+                "matched_name": record["name"],
+                "sanctions_id": record["id"],
+                "list": record["sanctions_list"],
+                "match_type": match_type,
                 "match_score": 0.95,
                 "details": "Potential sanctions list match - requires manual review"
             })
         
-        return json.dumps({
+        return to_prompt_json({
             "match_found": False,
             "entity": entity,
             "message": "No sanctions match found"
@@ -81,22 +145,28 @@ class LegalAgent:
     
     def _check_jurisdiction_risk(self, jurisdiction: str) -> str:
         """Check the risk level of a jurisdiction."""
-        high_risk = ["ir", "kp", "sy", "iran", "north korea", "syria"]
-        medium_risk = ["ru", "by", "russia", "belarus", "cayman islands", "panama"]
+        jurisdiction_key = jurisdiction.strip()
+        jurisdiction_lower = jurisdiction_key.lower()
         
-        jurisdiction_lower = jurisdiction.lower()
+        # Country codes and bare names resolve with a single dict hit
+        risk_level = (JURISDICTION_CODE_TO_RISK.get(jurisdiction_key.upper())
+                      or JURISDICTION_NAME_TO_RISK.get(jurisdiction_lower))
+        if risk_level is None:
+            if _JURISDICTION_PATTERNS["HIGH"].search(jurisdiction_lower):
+                risk_level = "HIGH"
+            elif _JURISDICTION_PATTERNS["MEDIUM"].search(jurisdiction_lower):
+                risk_level = "MEDIUM"
+            else:
+                risk_level = "LOW"
         
-        if any(hr in jurisdiction_lower for hr in high_risk):
-            risk_level = "HIGH"
+        if risk_level == "HIGH":
             details = "FATF blacklisted or heavily sanctioned jurisdiction"
-        elif any(mr in jurisdiction_lower for mr in medium_risk):
-            risk_level = "MEDIUM"
+        elif risk_level == "MEDIUM":
             details = "Enhanced due diligence required"
         else:
-            risk_level = "LOW"
             details = "Standard due diligence applies"
         
-        return json.dumps({
+        return to_prompt_json({
             "jurisdiction": jurisdiction,
             "risk_level": risk_level,
             "details": details
@@ -106,7 +176,7 @@ class LegalAgent:
         """Retrieve relevant compliance policies."""
         if self.policy_searcher:
             results = self.policy_searcher.search(topic)
-            return json.dumps(results)
+            return to_prompt_json(results)
         
         # Mock policies for demo
         policies = {
@@ -119,7 +189,7 @@ class LegalAgent:
         topic_lower = topic.lower()
         relevant_policies = [v for k, v in policies.items() if k in topic_lower or topic_lower in k]
         
-        return json.dumps({
+        return to_prompt_json({
             "topic": topic,
             "policies": relevant_policies if relevant_policies else ["General AML/BSA compliance required"]
         })
@@ -151,18 +221,22 @@ class LegalAgent:
                     "reason": "Transaction flagged for suspicious activity review"
                 })
             
-            return json.dumps({
+            return to_prompt_json({
                 "transaction_id": transaction.get("id"),
                 "reporting_requirements": requirements,
                 "requires_action": len(requirements) > 0
             })
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return to_prompt_json({"error": str(e)})
     
-    def evaluate(self, transactions: List[Dict], entities: List[str] = None) -> Dict:
-        """Run compliance evaluation on transactions."""
-        input_text = f"""Evaluate these transactions for compliance:
-        {json.dumps(transactions, indent=2)}
+    def _build_prompt(self, transactions: List[Dict], entities: List[str] = None) -> str:
+        """Build the compliance evaluation prompt for a chunk of transactions."""
+        if entities:
+            # Only list the entities that actually appear in this chunk
+            entities = [e for e in entities if any(e in txn.values() for txn in transactions)]
+        
+        return f"""Evaluate these transactions for compliance:
+        {to_prompt_json(transactions)}
         
         Entities to check: {entities or 'Extract from transactions'}
         
@@ -172,6 +246,22 @@ class LegalAgent:
         3. Regulatory reporting requirements
         4. Policy compliance status
         5. Recommended actions"""
+    
+    def evaluate(self, transactions: List[Dict], entities: List[str] = None) -> Dict:
+        """Run compliance evaluation on transactions, one batched LLM call per chunk."""
+        prompts = [self._build_prompt(chunk, entities) for chunk in chunk_transactions(transactions)]
+        
+        results = self.agent.batch(
+            [{"input": prompt} for prompt in prompts],
+            config={"max_concurrency": MAX_CONCURRENCY}
+        )
+        return merge_agent_results(results)
+    
+    async def evaluate_async(self, transactions: List[Dict], entities: List[str] = None) -> Dict:
+        """Run compliance evaluation with concurrent per-chunk LLM calls."""
+        prompts = [self._build_prompt(chunk, entities) for chunk in chunk_transactions(transactions)]
         
-        result = self.agent.invoke({"input": input_text})
-        return result
+        results = await asyncio.gather(
+            *[self.agent.ainvoke({"input": prompt}) for prompt in prompts]
+        )
+        return merge_agent_results(list(results))
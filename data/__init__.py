@@ -1,5 +1,19 @@
 # Data package
-from .sample_sanctions import SAMPLE_SANCTIONS, HIGH_RISK_JURISDICTIONS
+from .sample_sanctions import (
+    SAMPLE_SANCTIONS,
+    HIGH_RISK_JURISDICTIONS,
+    SANCTION_INDEX,
+    JURISDICTION_CODE_TO_RISK,
+    JURISDICTION_NAME_TO_RISK,
+)
 from .sample_policies import SAMPLE_POLICIES, RISK_SCORING_MATRIX
 
-__all__ = ["SAMPLE_SANCTIONS", "HIGH_RISK_JURISDICTIONS", "SAMPLE_POLICIES", "RISK_SCORING_MATRIX"]
+__all__ = [
+    "SAMPLE_SANCTIONS",
+    "HIGH_RISK_JURISDICTIONS",
+    "SANCTION_INDEX",
+    "JURISDICTION_CODE_TO_RISK",
+    "JURISDICTION_NAME_TO_RISK",
+    "SAMPLE_POLICIES",
+    "RISK_SCORING_MATRIX",
+]
@@ -64,3 +64,13 @@ HIGH_RISK_JURISDICTIONS = [
     {"code": "KY", "name": "Cayman Islands", "risk_level": "MEDIUM", "notes": "Tax haven - enhanced due diligence"},
     {"code": "PA", "name": "Panama", "risk_level": "MEDIUM", "notes": "Tax haven - enhanced due diligence"},
 ]
+
+# Every lowercased name and alias mapped to its index in SAMPLE_SANCTIONS
+SANCTION_INDEX = {
+    term.lower(): i
+    for i, s in enumerate(SAMPLE_SANCTIONS)
+    for term in [s["name"], *s.get("aliases", [])]
+}
+
+JURISDICTION_CODE_TO_RISK = {j["code"]: j["risk_level"] for j in HIGH_RISK_JURISDICTIONS}
+JURISDICTION_NAME_TO_RISK = {j["name"].lower(): j["risk_level"] for j in HIGH_RISK_JURISDICTIONS}
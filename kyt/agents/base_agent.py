@@ -2,11 +2,23 @@ from langchain_openai import AzureChatOpenAI
 from langgraph.prebuilt import create_react_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.tools import Tool
+from typing import Any, Dict, Hashable, List
+import functools
+import json
 import os
 
+# Transactions per LLM call when an analysis is split into batched prompts
+TRANSACTION_CHUNK_SIZE = 20
+# Upper bound on concurrent LLM calls issued for a single analysis
+MAX_CONCURRENCY = 5
 
+
+@functools.lru_cache(maxsize=1)
 def get_llm():
-    """Initialize and return the Azure OpenAI LLM instance."""
+    """
+    Initialize and return the Azure OpenAI LLM instance.
+    The client is created once per process and shared by every agent.
+    """
     return AzureChatOpenAI(
         azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
         api_key=os.getenv("AZURE_OPENAI_API_KEY"),
@@ -16,11 +28,58 @@ def get_llm():
     )
 
 
-def create_base_agent(llm, tools, system_prompt: str):
-    """Create a base agent with the given tools and system prompt."""
+# Compiled react-agent graphs shared across agent instances, keyed by
+# (id(llm), cache_key, system_prompt)
+_AGENT_CACHE: Dict[tuple, Any] = {}
+_AGENT_CACHE_SIZE = 16
+
+
+def create_base_agent(llm, tools, system_prompt: str, cache_key: Hashable = None):
+    """
+    Create a base agent with the given tools and system prompt.
+    
+    When cache_key is given, the compiled graph is reused by any later call
+    with the same LLM, key and prompt. Callers must only pass a key when
+    tools with the same key behave identically regardless of which instance
+    they are bound to.
+    """
+    key = (id(llm), cache_key, system_prompt)
+    if cache_key is not None and key in _AGENT_CACHE:
+        return _AGENT_CACHE[key]
+    
     # Use LangGraph's create_react_agent for modern agent creation
-    return create_react_agent(
+    agent = create_react_agent(
         model=llm,
         tools=tools,
         prompt=system_prompt
     )
+    
+    if cache_key is not None:
+        # The graph references the llm, so its id cannot be reused while cached
+        if len(_AGENT_CACHE) >= _AGENT_CACHE_SIZE:
+            _AGENT_CACHE.pop(next(iter(_AGENT_CACHE)))
+        _AGENT_CACHE[key] = agent
+    return agent
+
+
+def to_prompt_json(data: Any) -> str:
+    """
+    Serialize data for embedding in an LLM prompt or returning as a tool result.
+    Compact separators keep the prompt small and let json use its C encoder,
+    which it skips whenever indent is set.
+    """
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+def chunk_transactions(transactions: List[Dict],
+                       chunk_size: int = TRANSACTION_CHUNK_SIZE) -> List[List[Dict]]:
+    """Split transactions into independent chunks for batched agent calls."""
+    return [transactions[i:i + chunk_size] for i in range(0, len(transactions), chunk_size)]
+
+
+def merge_agent_results(results: List[Dict]) -> Dict:
+    """Merge per-chunk agent results into a single result."""
+    return {
+        "output": "\n\n".join(r.get("output", "") for r in results if r.get("output")),
+        "chunk_results": results
+    }
@@ -1,7 +1,127 @@
 from langchain_core.tools import Tool
-from .base_agent import get_llm, create_base_agent
-from typing import Dict, List
+from .base_agent import (
+    get_llm,
+    create_base_agent,
+    chunk_transactions,
+    merge_agent_results,
+    to_prompt_json,
+    MAX_CONCURRENCY,
+)
+from data.sample_sanctions import JURISDICTION_CODE_TO_RISK, JURISDICTION_NAME_TO_RISK
+from .legal_agent import screen_sanctions
+from operator import methodcaller
+from typing import Dict, List, Tuple
+import asyncio
 import json
+import numpy as np
+
+# Field accessors for column extraction; map() with these avoids a Python
+# generator frame per transaction and keeps the missing-field defaults
+_get_amount = methodcaller("get", "amount", 0)
+_get_account = methodcaller("get", "account_id")
+
+
+def aggregate_account_codes(codes: np.ndarray, amounts: np.ndarray,
+                            n_accounts: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Grouped count/sum/max over integer account codes.
+    
+    Pure array-in, array-out so the whole reduction runs inside NumPy's
+    compiled loops with no per-transaction Python dispatch.
+    """
+    counts = np.bincount(codes, minlength=n_accounts)
+    totals = np.bincount(codes, weights=amounts, minlength=n_accounts)
+    maxes = np.full(n_accounts, -np.inf)
+    np.maximum.at(maxes, codes, amounts)
+    return counts, totals, maxes
+
+
+def factorize_accounts(accounts: List) -> Tuple[List, np.ndarray]:
+    """
+    Intern account ids to integer codes, returning the labels in first-seen
+    order and the code of each transaction. Tolerates mixed or missing ids,
+    which np.unique cannot sort.
+    """
+    labels = {}
+    codes = np.fromiter((labels.setdefault(a, len(labels)) for a in accounts),
+                        dtype=np.intp, count=len(accounts))
+    return list(labels), codes
+
+
+def aggregate_by_account(accounts: List, amounts: List[float]) -> Tuple[List, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Group transaction amounts by account in a single vectorized pass.
+    
+    Returns the account labels (in first-seen order) together with per-account
+    transaction counts, totals and maximum amounts.
+    """
+    labels, codes = factorize_accounts(accounts)
+    counts, totals, maxes = aggregate_account_codes(
+        codes, np.asarray(amounts, dtype=np.float64), len(labels)
+    )
+    return labels, counts, totals, maxes
+
+
+def load_account_amounts(transactions_json: str) -> Tuple[List, List[float]]:
+    """
+    Parse a JSON array of transactions into parallel account/amount columns.
+    
+    The object_hook reduces each transaction object to an (account, amount)
+    pair as soon as it is decoded, so the full list of dicts is never held
+    in memory alongside the columns.
+    """
+    pairs = json.loads(
+        transactions_json,
+        object_hook=lambda obj: (_get_account(obj), _get_amount(obj))
+    )
+    if not pairs:
+        return [], []
+    accounts, amounts = zip(*pairs)
+    return list(accounts), list(amounts)
+
+
+# Rule thresholds in integer cents
+ROUND_UNIT_CENTS = 100_000
+REPORTING_THRESHOLD_CENTS = 1_000_000
+NEAR_THRESHOLD_CENTS = 900_000
+HIGH_VALUE_CENTS = 5_000_000
+
+
+def score_amounts(amounts) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Score transaction amounts with the single-transaction pattern rules.
+    
+    Every rule is a boolean mask over the whole batch, so scoring N
+    transactions is a handful of array operations rather than N branches.
+    Amounts are compared as int64 cents, which keeps the round-number test
+    exact, and scores are accumulated as int8.
+    Returns the capped risk scores and the per-rule masks.
+    """
+    cents = np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+    masks = {
+        "round_number": (cents > ROUND_UNIT_CENTS) & (cents % ROUND_UNIT_CENTS == 0),
+        "below_threshold": (cents >= NEAR_THRESHOLD_CENTS) & (cents < REPORTING_THRESHOLD_CENTS),
+        "high_value": cents > HIGH_VALUE_CENTS,
+    }
+    scores = (masks["round_number"].view(np.int8) * 2
+              + masks["below_threshold"].view(np.int8) * 4
+              + masks["high_value"].view(np.int8) * 3)
+    return np.minimum(scores, 10), masks
+
+
+_RULE_LABELS = {
+    "round_number": "Round number transaction",
+    "below_threshold": "Amount just below $10,000 reporting threshold",
+    "high_value": "High-value transaction",
+}
+
+
+def structuring_mask(counts: np.ndarray, totals: np.ndarray, maxes: np.ndarray) -> np.ndarray:
+    """
+    Flag accounts with multiple transactions, each below the reporting
+    threshold, that together exceed it.
+    """
+    return (counts >= 3) & (totals > 10000) & (maxes < 10000)
 
 
 class ForensicAgent:
@@ -19,22 +139,48 @@ class ForensicAgent:
     4. Flag transactions with high-risk jurisdictions
     5. Identify round-number transactions that may indicate laundering
     
+    Prefer forensic_full_scan for a set of transactions: it returns per-transaction
+    risk, structuring and velocity findings in one call. The single-purpose tools
+    remain for follow-up questions about one transaction or account.
+    
     Always provide detailed reasoning for your findings and assign risk scores (1-10).
     Be thorough but avoid false positives by considering legitimate business patterns."""
     
+    # Rule scores below CLEAR_BELOW or at/above BLOCK_AT are decided without the LLM
+    CLEAR_BELOW = 3
+    BLOCK_AT = 8
+    # Added to a row's amount score when its sender or receiver is on the
+    # sanctions list; amount rules alone score at most 6, so only a
+    # sanctions hit reaches BLOCK_AT
+    SANCTIONS_HIT_SCORE = 8
+    
     def __init__(self):
         self.llm = get_llm()
         self.tools = self._create_tools()
-        self.agent = create_base_agent(self.llm, self.tools, self.SYSTEM_PROMPT)
+        # Tools are stateless, so the compiled graph can be shared by all instances
+        self.agent = create_base_agent(
+            self.llm, self.tools, self.SYSTEM_PROMPT,
+            cache_key=tuple(t.name for t in self.tools)
+        )
     
     def _create_tools(self) -> List[Tool]:
         """Create tools for the forensic agent."""
         return [
+            Tool(
+                name="forensic_full_scan",
+                func=self._forensic_full_scan,
+                description="Preferred. Score every transaction and detect structuring and velocity patterns in one pass. Input: JSON array of transactions."
+            ),
             Tool(
                 name="analyze_transaction_pattern",
                 func=self._analyze_transaction_pattern,
                 description="Analyze a single transaction for suspicious patterns. Input: JSON string of transaction data."
             ),
+            Tool(
+                name="analyze_transactions_batch",
+                func=self._analyze_transactions_batch,
+                description="Score many transactions for suspicious patterns in one call. Input: JSON array of transactions."
+            ),
             Tool(
                 name="detect_structuring",
                 func=self._detect_structuring,
@@ -71,47 +217,97 @@ class ForensicAgent:
                 findings.append(f"High-value transaction: ${amount}")
                 risk_score += 3
             
-            return json.dumps({
+            return to_prompt_json({
                 "transaction_id": transaction.get("id"),
                 "findings": findings,
                 "risk_score": min(risk_score, 10),
                 "requires_review": risk_score >= 5
             })
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return to_prompt_json({"error": str(e)})
+    
+    def _analyze_transactions_batch(self, transactions_json: str) -> str:
+        """Score a batch of transactions for suspicious patterns."""
+        try:
+            transactions = json.loads(transactions_json)
+            scores, masks = score_amounts(list(map(_get_amount, transactions)))
+            results = self._per_transaction_results(transactions, scores, masks)
+            
+            return to_prompt_json({"results": results})
+        except Exception as e:
+            return to_prompt_json({"error": str(e)})
     
     def _detect_structuring(self, transactions_json: str) -> str:
         """Detect potential structuring patterns."""
+        try:
+            accounts, counts, totals, maxes = aggregate_by_account(
+                *load_account_amounts(transactions_json)
+            )
+            
+            findings = self._structuring_findings(accounts, counts, totals, maxes)
+            
+            return to_prompt_json({"structuring_findings": findings})
+        except Exception as e:
+            return to_prompt_json({"error": str(e)})
+    
+    def _forensic_full_scan(self, transactions_json: str) -> str:
+        """
+        Run the per-transaction, structuring and velocity checks together.
+        Parses the input once and derives all three from the same columns.
+        """
         try:
             transactions = json.loads(transactions_json)
-            findings = []
+            amounts = list(map(_get_amount, transactions))
             
-            # Group transactions by account
-            account_totals = {}
-            for txn in transactions:
-                account = txn.get("account_id")
-                amount = txn.get("amount", 0)
-                if account not in account_totals:
-                    account_totals[account] = []
-                account_totals[account].append(amount)
+            scores, masks = score_amounts(amounts)
+            accounts, counts, totals, maxes = aggregate_by_account(
+                list(map(_get_account, transactions)), amounts
+            )
             
-            # Check for structuring patterns
-            for account, amounts in account_totals.items():
-                if len(amounts) >= 3:
-                    # Multiple transactions that together exceed threshold
-                    total = sum(amounts)
-                    if total > 10000 and all(a < 10000 for a in amounts):
-                        findings.append({
-                            "account": account,
-                            "pattern": "Potential structuring",
-                            "total": total,
-                            "transaction_count": len(amounts),
-                            "risk_score": 8
-                        })
+            velocity = [
+                {
+                    "account_id": account,
+                    "transaction_count": int(counts[i]),
+                    "total_amount": float(totals[i]),
+                    "velocity_risk": "HIGH" if counts[i] > 10 else "NORMAL"
+                }
+                for i, account in enumerate(accounts)
+            ]
             
-            return json.dumps({"structuring_findings": findings})
+            return to_prompt_json({
+                "per_txn": self._per_transaction_results(transactions, scores, masks),
+                "structuring": self._structuring_findings(accounts, counts, totals, maxes),
+                "velocity": velocity
+            })
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return to_prompt_json({"error": str(e)})
+    
+    def _per_transaction_results(self, transactions: List[Dict], scores: np.ndarray,
+                                 masks: Dict[str, np.ndarray]) -> List[Dict]:
+        """Turn vectorized rule scores back into per-transaction findings."""
+        return [
+            {
+                "transaction_id": txn.get("id"),
+                "findings": [label for rule, label in _RULE_LABELS.items() if masks[rule][i]],
+                "risk_score": int(scores[i]),
+                "requires_review": bool(scores[i] >= 5)
+            }
+            for i, txn in enumerate(transactions)
+        ]
+    
+    def _structuring_findings(self, accounts: List, counts: np.ndarray,
+                              totals: np.ndarray, maxes: np.ndarray) -> List[Dict]:
+        """Build structuring findings for the flagged accounts."""
+        return [
+            {
+                "account": accounts[i],
+                "pattern": "Potential structuring",
+                "total": float(totals[i]),
+                "transaction_count": int(counts[i]),
+                "risk_score": 8
+            }
+            for i in np.flatnonzero(structuring_mask(counts, totals, maxes))
+        ]
     
     def _check_velocity(self, input_json: str) -> str:
         """Check transaction velocity for suspicious activity."""
@@ -122,7 +318,9 @@ class ForensicAgent:
             
             # Calculate velocity metrics
             total_transactions = len(transactions)
-            total_amount = sum(t.get("amount", 0) for t in transactions)
+            amounts = np.fromiter(map(_get_amount, transactions),
+                                  dtype=np.float64, count=total_transactions)
+            total_amount = float(amounts.sum())
             
             findings = {
                 "account_id": account_id,
@@ -131,20 +329,85 @@ class ForensicAgent:
                 "velocity_risk": "HIGH" if total_transactions > 10 else "NORMAL"
             }
             
-            return json.dumps(findings)
+            return to_prompt_json(findings)
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return to_prompt_json({"error": str(e)})
     
-    def analyze(self, transactions: List[Dict]) -> Dict:
-        """Run forensic analysis on transactions."""
-        input_text = f"""Analyze these transactions for suspicious patterns:
-        {json.dumps(transactions, indent=2)}
+    def _build_prompt(self, transactions: List[Dict]) -> str:
+        """Build the forensic analysis prompt for a chunk of transactions."""
+        return f"""Analyze these transactions for suspicious patterns:
+        {to_prompt_json(transactions)}
         
         Provide a comprehensive forensic analysis including:
         1. Individual transaction risk assessment
         2. Structuring pattern detection
         3. Velocity analysis
         4. Overall risk summary"""
+    
+    def _prefilter(self, transactions: List[Dict]) -> Tuple[List[Dict], Dict[str, List]]:
+        """
+        Split transactions into rule-decided and ambiguous rows.
+        
+        Rows are scored by the amount rules plus SANCTIONS_HIT_SCORE when the
+        sender or receiver screens against the sanctions list. Rows scoring
+        below CLEAR_BELOW are cleared and rows at or above BLOCK_AT are blocked
+        without an LLM call. Rows from accounts showing a structuring
+        pattern or sent to a listed high-risk jurisdiction are always kept for the
+        LLM, since those risks are invisible to the per-row amount rules.
+        """
+        amounts = list(map(_get_amount, transactions))
+        scores, _ = score_amounts(amounts)
+        
+        accounts, counts, totals, maxes = aggregate_by_account(
+            list(map(_get_account, transactions)), amounts
+        )
+        structuring_accounts = {
+            accounts[i] for i in np.flatnonzero(structuring_mask(counts, totals, maxes))
+        }
+        
+        ambiguous = []
+        auto_classified = {"clear": [], "block": []}
+        for txn, score in zip(transactions, scores.tolist()):
+            if any(screen_sanctions(str(txn.get(party) or "")) is not None
+                   for party in ("sender_name", "receiver_name")):
+                score = min(score + self.SANCTIONS_HIT_SCORE, 10)
+            country = str(txn.get("country") or "").strip()
+            keep = (txn.get("account_id") in structuring_accounts
+                    or country.upper() in JURISDICTION_CODE_TO_RISK
+                    or country.lower() in JURISDICTION_NAME_TO_RISK)
+            
+            if not keep and score < self.CLEAR_BELOW:
+                auto_classified["clear"].append(txn.get("id"))
+            elif not keep and score >= self.BLOCK_AT:
+                auto_classified["block"].append(txn.get("id"))
+            else:
+                ambiguous.append(txn)
+        
+        return ambiguous, auto_classified
+    
+    def analyze(self, transactions: List[Dict]) -> Dict:
+        """
+        Run forensic analysis on transactions.
+        Rule-decided rows are resolved locally; the rest go to the LLM in
+        one batched call per chunk.
+        """
+        ambiguous, auto_classified = self._prefilter(transactions)
+        prompts = [self._build_prompt(chunk) for chunk in chunk_transactions(ambiguous)]
+        
+        results = []
+        if prompts:
+            results = self.agent.batch(
+                [{"input": prompt} for prompt in prompts],
+                config={"max_concurrency": MAX_CONCURRENCY}
+            )
+        return {**merge_agent_results(results), "auto_classified": auto_classified}
+    
+    async def analyze_async(self, transactions: List[Dict]) -> Dict:
+        """Run forensic analysis on transactions with concurrent per-chunk LLM calls."""
+        ambiguous, auto_classified = self._prefilter(transactions)
+        prompts = [self._build_prompt(chunk) for chunk in chunk_transactions(ambiguous)]
         
-        result = self.agent.invoke({"input": input_text})
-        return result
+        results = await asyncio.gather(
+            *[self.agent.ainvoke({"input": prompt}) for prompt in prompts]
+        )
+        return {**merge_agent_results(list(results)), "auto_classified": auto_classified}
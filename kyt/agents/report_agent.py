@@ -1,9 +1,208 @@
 from langchain_core.tools import Tool
-from .base_agent import get_llm, create_base_agent
+from .base_agent import get_llm, create_base_agent, to_prompt_json
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Union
+import asyncio
 import json
 import hashlib
+import itertools
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _compact(dt: datetime) -> str:
+    """Format dt as YYYYmmddHHMMSS with integer formatting rather than strftime."""
+    return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}{dt.hour:02d}{dt.minute:02d}{dt.second:02d}"
+
+
+def _iso_z(dt: datetime) -> str:
+    """Format a naive UTC datetime as ISO 8601 with a Z suffix."""
+    return dt.isoformat() + "Z"
+
+
+@dataclass(frozen=True)
+class ReportContext:
+    """
+    Timestamps captured once and shared by the report-level fields of one
+    report. Audit events are stamped when they occur and numbered from
+    event_sequence, so they stay distinct and ordered within the report.
+    """
+    now_iso: str
+    now_compact: str
+    report_stamp: str
+    event_sequence: Iterator[int] = field(
+        default_factory=lambda: itertools.count(1), compare=False, repr=False
+    )
+    
+    @classmethod
+    def capture(cls) -> "ReportContext":
+        """Read the clock once and pre-format every timestamp a report needs."""
+        now = datetime.utcnow()
+        compact = _compact(now)
+        return cls(
+            now_iso=_iso_z(now),
+            now_compact=compact,
+            report_stamp=f"{compact[:8]}-{compact[8:]}"
+        )
+
+
+# Context of the report currently being generated. A ContextVar rather than an
+# instance attribute so tools on a shared agent graph see the caller's report
+_REPORT_CONTEXT: ContextVar[Optional[ReportContext]] = ContextVar("report_context", default=None)
+# Audit-trail buffer of the ReportAgent currently generating a report, if it
+# persists audit entries to blob storage
+_AUDIT_BUFFER: ContextVar[Optional[Deque[Dict]]] = ContextVar("audit_buffer", default=None)
+
+# Maximum audit-trail entries written to blob storage in a single upload
+AUDIT_FLUSH_BATCH = 64
+
+
+def _iter_report_chunks(content: Any) -> Iterator[bytes]:
+    """
+    Yield a report as encoded chunks for incremental hashing.
+    
+    str and bytes are yielded whole. Dicts and lists are streamed through
+    the JSON encoder (compact, sorted keys) so the full serialized report is
+    never materialized. Any other iterable is treated as pre-split chunks.
+    """
+    if isinstance(content, bytes):
+        yield content
+    elif isinstance(content, str):
+        yield content.encode()
+    elif isinstance(content, (dict, list)):
+        encoder = json.JSONEncoder(separators=(",", ":"), sort_keys=True, default=str)
+        for chunk in encoder.iterencode(content):
+            yield chunk.encode()
+    else:
+        for chunk in content:
+            yield chunk if isinstance(chunk, bytes) else chunk.encode()
+
+
+# Supported report hash algorithms, each initialized once; copy() clones a
+# base without repeating the algorithm lookup. SHA-256 is the default for
+# regulatory output. BLAKE2b (256-bit digest) is faster in software on CPUs
+# without SHA extensions where any cryptographic hash is acceptable.
+_HASHER_BASES = {
+    "SHA-256": hashlib.sha256(),
+    "BLAKE2b-256": hashlib.blake2b(digest_size=32),
+}
+DEFAULT_REPORT_HASH_ALGORITHM = "SHA-256"
+
+
+def _configured_hash_algorithm() -> str:
+    """
+    The report hash algorithm named by REPORT_HASH_ALGORITHM, checked once
+    at import. An unsupported name falls back to SHA-256 with a warning
+    rather than failing every report hash.
+    """
+    algorithm = os.getenv("REPORT_HASH_ALGORITHM", DEFAULT_REPORT_HASH_ALGORITHM)
+    if algorithm not in _HASHER_BASES:
+        logger.warning(
+            "Unsupported REPORT_HASH_ALGORITHM %r; expected one of %s. Using %s.",
+            algorithm, ", ".join(_HASHER_BASES), DEFAULT_REPORT_HASH_ALGORITHM
+        )
+        return DEFAULT_REPORT_HASH_ALGORITHM
+    return algorithm
+
+
+REPORT_HASH_ALGORITHM = _configured_hash_algorithm()
+
+
+def _report_hexdigest(content: Any, algorithm: Optional[str] = None) -> str:
+    """Hex digest of a report in any form accepted by _iter_report_chunks."""
+    algorithm = algorithm or REPORT_HASH_ALGORITHM
+    try:
+        hasher = _HASHER_BASES[algorithm].copy()
+    except KeyError:
+        raise ValueError(
+            f"Unsupported report hash algorithm {algorithm!r}; "
+            f"expected one of {', '.join(_HASHER_BASES)}"
+        ) from None
+    for chunk in _iter_report_chunks(content):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def batch_hash_reports(contents: List[Any], algorithm: Optional[str] = None) -> List[str]:
+    """
+    Hash many reports, returning hex digests in input order.
+    hashlib releases the GIL while hashing large buffers, so a thread pool
+    hashes several reports in parallel across cores.
+    """
+    if len(contents) < 2:
+        return [_report_hexdigest(c, algorithm) for c in contents]
+    
+    with ThreadPoolExecutor(max_workers=min(len(contents), os.cpu_count() or 1)) as executor:
+        return list(executor.map(lambda c: _report_hexdigest(c, algorithm), contents))
+
+
+# Risk score thresholds for MEDIUM and HIGH; scores below the first are LOW
+_RISK_THRESHOLDS = np.array([4.0, 7.0])
+
+
+def aggregate_risk_scores(risk_scores: Any) -> Dict[str, Any]:
+    """
+    Summarize per-transaction risk scores in vectorized passes over one array.
+    Returns the mean, 95th percentile and LOW/MEDIUM/HIGH counts bucketed by
+    _RISK_THRESHOLDS.
+    """
+    scores = np.asarray(risk_scores, dtype=np.float64)
+    if not scores.size:
+        return {"mean": 0, "p95": 0, "low": 0, "medium": 0, "high": 0}
+    
+    # side="right" puts a score equal to a threshold in the higher bucket
+    low, medium, high = np.bincount(
+        np.searchsorted(_RISK_THRESHOLDS, scores, side="right"), minlength=3
+    ).tolist()
+    return {
+        "mean": float(scores.mean()),
+        "p95": float(np.quantile(scores, 0.95)),
+        "low": low,
+        "medium": medium,
+        "high": high,
+    }
+
+
+# Regulatory report layout as (findings key, (section, field), default). A
+# field of None places the value directly at the section. Order matches the
+# order sections appear in the report.
+_REPORT_SCHEDULE = (
+    ("period", ("executive_summary", "period_covered"), "N/A"),
+    ("transaction_count", ("executive_summary", "total_transactions"), 0),
+    ("alert_count", ("executive_summary", "alerts_generated"), 0),
+    ("escalations", ("executive_summary", "escalations_required"), 0),
+    ("forensic_results", ("forensic_analysis", None), {}),
+    ("compliance_results", ("compliance_evaluation", None), {}),
+    ("overall_risk", ("risk_assessment", "overall_risk"), "PENDING"),
+    ("risk_factors", ("risk_assessment", "risk_factors"), []),
+    ("recommendations", ("recommendations", None), []),
+    ("audit_trail", ("appendix", "audit_trail"), []),
+    ("evidence", ("appendix", "evidence_references"), []),
+)
+
+
+def _apply_report_schedule(findings: Dict, report: Dict) -> Dict:
+    """
+    Fill report from findings by walking _REPORT_SCHEDULE.
+    Defaults are shared constants; the report is serialized, never mutated.
+    """
+    get = findings.get
+    for source_key, (section, field), default in _REPORT_SCHEDULE:
+        value = get(source_key, default)
+        if field is None:
+            report[section] = value
+        else:
+            report.setdefault(section, {})[field] = value
+    return report
 
 
 class ReportAgent:
@@ -28,11 +227,21 @@ class ReportAgent:
     - Follow regulatory formatting requirements
     - Ready for examiner review"""
     
+    # Overall risk levels indexed by the number of thresholds (4, 7) reached
+    _RISK_LEVELS = ("LOW", "MEDIUM", "HIGH")
+    
     def __init__(self, blob_storage_client=None):
         self.llm = get_llm()
         self.blob_storage_client = blob_storage_client
+        # Audit entries waiting to be written to blob storage by flush()
+        self._audit_buffer: Deque[Dict] = deque()
+        self._audit_batches_written = 0
         self.tools = self._create_tools()
-        self.agent = create_base_agent(self.llm, self.tools, self.SYSTEM_PROMPT)
+        # Tools do not depend on instance state, so the compiled graph can be shared
+        self.agent = create_base_agent(
+            self.llm, self.tools, self.SYSTEM_PROMPT,
+            cache_key=tuple(t.name for t in self.tools)
+        )
     
     def _create_tools(self) -> List[Tool]:
         """Create tools for the report agent."""
@@ -59,15 +268,25 @@ class ReportAgent:
             ),
         ]
     
-    def _generate_audit_trail(self, event_json: str) -> str:
+    def _context(self, ctx: Optional[ReportContext] = None) -> ReportContext:
+        """Return the given context, the active report's context, or a fresh one."""
+        return ctx or _REPORT_CONTEXT.get() or ReportContext.capture()
+    
+    def _generate_audit_trail(self, event_json: str, ctx: Optional[ReportContext] = None) -> str:
         """Generate a timestamped audit trail entry."""
         try:
             event = json.loads(event_json)
+            ctx = self._context(ctx)
+            now = datetime.utcnow()
+            if "id" in event:
+                event_id = event["id"]
+            else:
+                event_id = f"EVT-{_compact(now)}-{next(ctx.event_sequence):04d}"
             
             audit_entry = {
-                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "timestamp": _iso_z(now),
                 "event_type": event.get("type", "ANALYSIS"),
-                "event_id": event.get("id", f"EVT-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"),
+                "event_id": event_id,
                 "actor": event.get("actor", "KYT_SYSTEM"),
                 "action": event.get("action", ""),
                 "details": event.get("details", {}),
@@ -75,105 +294,141 @@ class ReportAgent:
                 "evidence": event.get("evidence", [])
             }
             
-            return json.dumps(audit_entry, indent=2)
+            # Buffered for one batched upload instead of a write per event
+            buffer = _AUDIT_BUFFER.get()
+            if buffer is not None:
+                buffer.append(audit_entry)
+            
+            return to_prompt_json(audit_entry)
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return to_prompt_json({"error": str(e)})
     
-    def _create_risk_summary(self, findings_json: str) -> str:
+    def _create_risk_summary(self, findings_json: str, ctx: Optional[ReportContext] = None) -> str:
         """Create a risk summary from analysis results."""
         try:
             findings = json.loads(findings_json)
+            ctx = self._context(ctx)
             
-            # Calculate aggregate risk metrics
-            risk_scores = findings.get("risk_scores", [])
-            avg_risk = sum(risk_scores) / len(risk_scores) if risk_scores else 0
+            # Calculate aggregate risk metrics; counts the findings omit are
+            # derived from the scores
+            stats = aggregate_risk_scores(findings.get("risk_scores", []))
             
             summary = {
-                "summary_date": datetime.utcnow().isoformat() + "Z",
+                "summary_date": ctx.now_iso,
                 "total_transactions_analyzed": findings.get("transaction_count", 0),
-                "high_risk_count": findings.get("high_risk_count", 0),
-                "medium_risk_count": findings.get("medium_risk_count", 0),
-                "low_risk_count": findings.get("low_risk_count", 0),
-                "average_risk_score": round(avg_risk, 2),
-                "overall_risk_level": self._determine_overall_risk(avg_risk),
+                "high_risk_count": findings.get("high_risk_count", stats["high"]),
+                "medium_risk_count": findings.get("medium_risk_count", stats["medium"]),
+                "low_risk_count": findings.get("low_risk_count", stats["low"]),
+                "average_risk_score": round(stats["mean"], 2),
+                "p95_risk_score": round(stats["p95"], 2),
+                "overall_risk_level": self._determine_overall_risk(stats["mean"]),
                 "key_findings": findings.get("key_findings", []),
                 "recommended_actions": findings.get("recommended_actions", []),
                 "sanctions_matches": findings.get("sanctions_matches", 0),
                 "reporting_required": findings.get("reporting_required", False)
             }
             
-            return json.dumps(summary, indent=2)
+            return to_prompt_json(summary)
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return to_prompt_json({"error": str(e)})
     
     def _determine_overall_risk(self, avg_risk: float) -> str:
         """Determine overall risk level from average score."""
-        if avg_risk >= 7:
-            return "HIGH"
-        elif avg_risk >= 4:
-            return "MEDIUM"
-        else:
-            return "LOW"
+        # Each threshold crossed moves one level up: <4 LOW, <7 MEDIUM, else HIGH.
+        # int() because NumPy scalars compare to np.bool_, which cannot index
+        return self._RISK_LEVELS[int(avg_risk >= 4) + int(avg_risk >= 7)]
     
-    def _format_regulatory_report(self, findings_json: str) -> str:
+    def _format_regulatory_report(self, findings_json: str, ctx: Optional[ReportContext] = None) -> str:
         """Format findings into a regulatory-compliant report."""
         try:
             findings = json.loads(findings_json)
+            ctx = self._context(ctx)
             
             report = {
                 "report_metadata": {
-                    "report_id": f"KYT-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
-                    "generated_at": datetime.utcnow().isoformat() + "Z",
+                    "report_id": f"KYT-{ctx.report_stamp}",
+                    "generated_at": ctx.now_iso,
                     "report_type": "KYT_AUDIT_REPORT",
                     "version": "1.0"
-                },
-                "executive_summary": {
-                    "period_covered": findings.get("period", "N/A"),
-                    "total_transactions": findings.get("transaction_count", 0),
-                    "alerts_generated": findings.get("alert_count", 0),
-                    "escalations_required": findings.get("escalations", 0)
-                },
-                "forensic_analysis": findings.get("forensic_results", {}),
-                "compliance_evaluation": findings.get("compliance_results", {}),
-                "risk_assessment": {
-                    "overall_risk": findings.get("overall_risk", "PENDING"),
-                    "risk_factors": findings.get("risk_factors", [])
-                },
-                "recommendations": findings.get("recommendations", []),
-                "appendix": {
-                    "audit_trail": findings.get("audit_trail", []),
-                    "evidence_references": findings.get("evidence", [])
                 }
             }
+            _apply_report_schedule(findings, report)
             
-            return json.dumps(report, indent=2)
+            return to_prompt_json(report)
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return to_prompt_json({"error": str(e)})
     
-    def _generate_report_hash(self, content: str) -> str:
-        """Generate a tamper-evident hash for the report."""
-        report_hash = hashlib.sha256(content.encode()).hexdigest()
+    def _generate_report_hash(self, content: Union[str, bytes, Dict, Iterable],
+                              ctx: Optional[ReportContext] = None) -> str:
+        """
+        Generate a tamper-evident hash for the report.
+        Accepts a serialized report (str or bytes), a report dict streamed
+        through the JSON encoder, or an iterable of chunks; the hash is fed
+        incrementally so no second full copy of the report is built.
+        """
+        try:
+            report_hash = _report_hexdigest(content)
+            
+            return to_prompt_json({
+                "hash_algorithm": REPORT_HASH_ALGORITHM,
+                "hash_value": report_hash,
+                "generated_at": self._context(ctx).now_iso,
+                "purpose": "Tamper-evident verification"
+            })
+        except Exception as e:
+            return to_prompt_json({"error": str(e)})
+    
+    def flush(self, ctx: Optional[ReportContext] = None) -> int:
+        """
+        Write buffered audit-trail entries to blob storage.
+        Entries are uploaded as JSON Lines blobs of up to AUDIT_FLUSH_BATCH
+        entries each, so a report costs one request per batch rather than
+        one per event. A failed upload is logged and its entries, with any
+        after them, stay buffered for the next flush. Returns the number of
+        entries written.
+        """
+        if self.blob_storage_client is None:
+            self._audit_buffer.clear()
+            return 0
         
-        return json.dumps({
-            "hash_algorithm": "SHA-256",
-            "hash_value": report_hash,
-            "generated_at": datetime.utcnow().isoformat() + "Z",
-            "purpose": "Tamper-evident verification"
-        })
+        stamp = self._context(ctx).report_stamp
+        written = 0
+        while self._audit_buffer:
+            batch = [self._audit_buffer.popleft()
+                     for _ in range(min(AUDIT_FLUSH_BATCH, len(self._audit_buffer)))]
+            try:
+                self.blob_storage_client.upload_blob(
+                    name=f"audit-trail/KYT-{stamp}-{self._audit_batches_written + 1:04d}.jsonl",
+                    data="\n".join(to_prompt_json(entry) for entry in batch)
+                )
+            except Exception as e:
+                # Back at the front, in their original order
+                self._audit_buffer.extendleft(reversed(batch))
+                logger.error("Audit trail upload failed; %d entries kept for retry: %s",
+                             len(self._audit_buffer), e)
+                break
+            self._audit_batches_written += 1
+            written += len(batch)
+        return written
     
-    def generate_report(self, forensic_results: Dict, compliance_results: Dict, 
-                       transactions: List[Dict]) -> Dict:
-        """Generate a comprehensive audit report."""
-        input_text = f"""Generate a comprehensive KYT audit report based on:
+    def batch_hash(self, contents: List[Any], algorithm: Optional[str] = None) -> List[str]:
+        """Generate tamper-evident hashes for several reports at once."""
+        return batch_hash_reports(contents, algorithm)
+    
+    @staticmethod
+    def _build_prompt(forensic_results: Dict, compliance_results: Dict,
+                      transactions: List[Dict]) -> str:
+        """Build the report-generation prompt."""
+        return f"""Generate a comprehensive KYT audit report based on:
         
         Forensic Analysis Results:
-        {json.dumps(forensic_results, indent=2)}
+        {to_prompt_json(forensic_results)}
         
         Compliance Evaluation Results:
-        {json.dumps(compliance_results, indent=2)}
+        {to_prompt_json(compliance_results)}
         
         Transactions Analyzed:
-        {json.dumps(transactions, indent=2)}
+        {to_prompt_json(transactions)}
         
         Create a complete audit report including:
         1. Executive summary
@@ -183,6 +438,49 @@ class ReportAgent:
         5. Recommended actions
         6. Full audit trail
         7. Report hash for verification"""
+    
+    @contextmanager
+    def _report_scope(self) -> Iterator[ReportContext]:
+        """
+        Activate a fresh report context (and this agent's audit buffer) for
+        the tool calls made while generating one report.
+        """
+        # Every tool call in this report shares one captured timestamp
+        ctx = ReportContext.capture()
+        token = _REPORT_CONTEXT.set(ctx)
+        buffer_token = _AUDIT_BUFFER.set(
+            self._audit_buffer if self.blob_storage_client is not None else None
+        )
+        try:
+            yield ctx
+        finally:
+            _AUDIT_BUFFER.reset(buffer_token)
+            _REPORT_CONTEXT.reset(token)
+    
+    def generate_report(self, forensic_results: Dict, compliance_results: Dict, 
+                       transactions: List[Dict]) -> Dict:
+        """Generate a comprehensive audit report."""
+        input_text = self._build_prompt(forensic_results, compliance_results, transactions)
+        
+        with self._report_scope() as ctx:
+            try:
+                result = self.agent.invoke({"input": input_text})
+            finally:
+                self.flush(ctx)
+        return result
+    
+    async def generate_report_async(self, forensic_results: Dict, compliance_results: Dict,
+                                    transactions: List[Dict]) -> Dict:
+        """
+        Async variant of generate_report for callers that run it alongside
+        other stages on one event loop.
+        """
+        input_text = self._build_prompt(forensic_results, compliance_results, transactions)
         
-        result = self.agent.invoke({"input": input_text})
+        with self._report_scope() as ctx:
+            try:
+                result = await self.agent.ainvoke({"input": input_text})
+            finally:
+                # Blob uploads are blocking; keep them off the event loop
+                await asyncio.to_thread(self.flush, ctx)
         return result
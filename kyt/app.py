@@ -1,10 +1,13 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
+import hashlib
+import io
 import json
 import os
 from dotenv import load_dotenv
-from orchestrator.kyt_orchestrator import KYTOrchestrator
+
+# pandas and the orchestrator (langchain, Azure SDKs) are imported inside the
+# functions that need them so pages that don't use them start quickly
 
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
@@ -17,7 +20,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -55,27 +58,102 @@ st.markdown("""
         border: 1px solid #E2E8F0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # Initialize session state
-if "orchestrator" not in st.session_state:
-    st.session_state.orchestrator = KYTOrchestrator()
 if "analysis_results" not in st.session_state:
     st.session_state.analysis_results = None
 if "transactions" not in st.session_state:
     st.session_state.transactions = None
 
 
+# Audit reports shown per page on the history page
+AUDIT_REPORTS_PAGE_SIZE = 10
+
+# The pyarrow engine would parse dates into date objects; keep them as the
+# ISO strings the C engine produced
+_CSV_DTYPES = {"transaction_date": str}
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _read_sample_transactions():
+    """Parse the sample transactions CSV once per hour instead of on every click."""
+    import pandas as pd
+    return pd.read_csv("data/sample_transactions.csv", engine="pyarrow", dtype=_CSV_DTYPES)
+
+
+@st.cache_data(show_spinner=False)
+def _parse_uploaded_transactions(blob: bytes):
+    """Parse an uploaded CSV, cached by file content so reruns skip the parse."""
+    import pandas as pd
+    return pd.read_csv(io.BytesIO(blob), engine="pyarrow", dtype=_CSV_DTYPES)
+
+
 def load_sample_transactions():
     """Load sample transactions from CSV."""
     try:
-        df = pd.read_csv("data/sample_transactions.csv")
-        return df
+        return _read_sample_transactions()
     except Exception as e:
         st.error(f"Error loading sample transactions: {e}")
         return None
 
 
+def _file_stamp(dt: datetime) -> str:
+    """Format dt as YYYYmmdd_HHMMSS for file names without going through strftime."""
+    return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}_{dt.hour:02d}{dt.minute:02d}{dt.second:02d}"
+
+
+@st.cache_resource(show_spinner=False)
+def _initialize_search_indexes():
+    """Create the search indexes once per server process."""
+    from services.search_service import initialize_all_indexes
+    return initialize_all_indexes()
+
+
+def _get_orchestrator():
+    """Return the session's orchestrator, creating it on first use."""
+    if "orchestrator" not in st.session_state:
+        _initialize_search_indexes()
+        from orchestrator.kyt_orchestrator import KYTOrchestrator
+        st.session_state.orchestrator = KYTOrchestrator()
+    return st.session_state.orchestrator
+
+
+def _report_json_bytes(results) -> bytes:
+    """
+    Pretty-printed JSON download payload, encoded to bytes as it is generated.
+    Streaming the encoder into a buffer avoids holding the full report as a
+    str and then again as bytes.
+    """
+    buffer = io.BytesIO()
+    encoder = json.JSONEncoder(indent=2, default=str)
+    for chunk in encoder.iterencode(results):
+        # ensure_ascii (the default) keeps every chunk plain ASCII
+        buffer.write(chunk.encode("ascii"))
+    return buffer.getvalue()
+
+
+def dataframe_to_records(df) -> list:
+    """
+    Equivalent of df.to_dict("records"), built column-wise.
+    Each column is converted to Python scalars in a single tolist() call and
+    rows are zipped against one shared key tuple, instead of boxing values
+    cell by cell.
+    """
+    keys = tuple(df.columns)
+    columns = [df[key].tolist() for key in keys]
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+def _inject_css():
+    """
+    Emit the custom CSS for this run.
+    Streamlit drops any element a rerun does not re-emit, so this runs on
+    every rerun; it only pushes the prebuilt constant.
+    """
+    st.markdown(_CSS, unsafe_allow_html=True)
+
+
 def display_header():
     """Display the main header."""
     st.markdown('<p class="main-header">🔍 Autonomous KYT Auditor</p>', unsafe_allow_html=True)
@@ -133,7 +211,7 @@ def display_transaction_analysis():
             st.success("Sample data loaded!")
     
     if uploaded_file is not None:
-        st.session_state.transactions = pd.read_csv(uploaded_file)
+        st.session_state.transactions = _parse_uploaded_transactions(uploaded_file.getvalue())
     
     # Display transactions
     if st.session_state.transactions is not None:
@@ -160,7 +238,7 @@ def run_analysis():
         return
     
     # Convert DataFrame to list of dicts
-    transactions = st.session_state.transactions.to_dict("records")
+    transactions = dataframe_to_records(st.session_state.transactions)
     
     # Progress indicators
     progress_bar = st.progress(0)
@@ -172,7 +250,7 @@ def run_analysis():
     
     try:
         with st.spinner("Running AI-powered analysis..."):
-            results = st.session_state.orchestrator.analyze_transactions(
+            results = _get_orchestrator().analyze_transactions(
                 transactions,
                 callback=update_progress
             )
@@ -182,8 +260,9 @@ def run_analysis():
         status_text.text("Analysis complete!")
         st.success("✅ Analysis completed successfully!")
         
-        # Display results
+        # Display results; main() skips its own render for this run
         display_analysis_results()
+        st.session_state._results_rendered = True
         
     except Exception as e:
         st.error(f"Analysis failed: {str(e)}")
@@ -295,15 +374,17 @@ def display_summary(summary):
 
 def display_forensic_results(forensic):
     """Display forensic analysis results."""
+    import pandas as pd
+    
     st.markdown("### 🔬 Forensic Analysis Results")
     
     # High-risk transactions
     high_risk = forensic.get("high_risk_transactions", [])
     if high_risk:
         st.markdown("#### High-Risk Transactions")
-        for txn in high_risk:
-            with st.expander(f"⚠️ Transaction {txn.get('id', 'Unknown')} - Risk Score: {txn.get('risk_score', 0)}/10"):
-                st.json(txn)
+        st.dataframe(pd.DataFrame(high_risk), use_container_width=True, hide_index=True)
+        with st.expander("🔍 Raw data"):
+            st.json(high_risk)
     else:
         st.success("No high-risk transactions detected.")
     
@@ -311,10 +392,11 @@ def display_forensic_results(forensic):
     patterns = forensic.get("patterns_detected", [])
     if patterns:
         st.markdown("#### Suspicious Patterns Detected")
-        for pattern in patterns:
-            severity_icon = "🔴" if pattern.get("severity") == "HIGH" else "🟡"
-            st.warning(f"{severity_icon} **{pattern.get('type', 'Unknown Pattern')}** - Account: {pattern.get('account', 'N/A')}")
-            st.json(pattern)
+        high_severity = sum(1 for p in patterns if p.get("severity") == "HIGH")
+        st.warning(f"🔴 **{high_severity}** high-severity of {len(patterns)} patterns detected")
+        st.dataframe(pd.DataFrame(patterns), use_container_width=True, hide_index=True)
+        with st.expander("🔍 Raw data"):
+            st.json(patterns)
     else:
         st.success("No suspicious patterns detected.")
 
@@ -370,17 +452,14 @@ def display_audit_report(report):
     
     # Download button
     if st.session_state.analysis_results:
-        report_json = json.dumps(st.session_state.analysis_results, indent=2, default=str)
-        if "download_audit_report_counter" not in st.session_state:
-            st.session_state.download_audit_report_counter = 0
-
-        st.session_state.download_audit_report_counter += 1
-        download_key = f"download_audit_report_{st.session_state.download_audit_report_counter}"
+        report_json = _report_json_bytes(st.session_state.analysis_results)
+        # Keyed by content so identical results reuse the widget across reruns
+        download_key = f"download_audit_report_{hashlib.sha1(report_json).hexdigest()[:12]}"
 
         st.download_button(
             label="📥 Download Full Report (JSON)",
             data=report_json,
-            file_name=f"kyt_audit_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            file_name=f"kyt_audit_report_{_file_stamp(datetime.now())}.json",
             mime="application/json",
             key=download_key,
         )
@@ -390,14 +469,30 @@ def display_audit_reports_page():
     """Display the audit reports page."""
     st.markdown("## 📋 Audit Reports History")
     
-    history = st.session_state.orchestrator.get_analysis_history()
+    # No orchestrator yet means no analysis has run in this session
+    orchestrator = st.session_state.get("orchestrator")
+    history = orchestrator.get_analysis_history() if orchestrator else []
     
     if not history:
         st.info("No audit reports yet. Run an analysis first.")
         return
     
-    for i, analysis in enumerate(reversed(history)):
+    from agents.report_agent import REPORT_HASH_ALGORITHM, batch_hash_reports
+    
+    # Only the current page is hashed and rendered, newest reports first
+    page_count = -(-len(history) // AUDIT_REPORTS_PAGE_SIZE)
+    page = 1
+    if page_count > 1:
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+    start = (page - 1) * AUDIT_REPORTS_PAGE_SIZE
+    analyses = list(reversed(history))[start:start + AUDIT_REPORTS_PAGE_SIZE]
+    
+    # Hash the page's reports in one parallel batch for tamper-evidence checks
+    report_hashes = batch_hash_reports(analyses)
+    
+    for i, (analysis, report_hash) in enumerate(zip(analyses, report_hashes), start=start):
         with st.expander(f"Report: {analysis.get('id', f'Analysis {i+1}')} - {analysis.get('status', 'Unknown')}"):
+            st.caption(f"{REPORT_HASH_ALGORITHM}: {report_hash}")
             st.json(analysis)
 
 
@@ -420,12 +515,13 @@ def display_settings_page():
 
 def main():
     """Main application entry point."""
+    _inject_css()
     display_header()
     page = display_sidebar()
     
     if page == "📊 Transaction Analysis":
         display_transaction_analysis()
-        if st.session_state.analysis_results:
+        if st.session_state.analysis_results and not st.session_state.pop("_results_rendered", False):
             display_analysis_results()
     elif page == "📈 Analysis Results":
         display_analysis_results()
@@ -1,11 +1,70 @@
-from agents.forensic_agent import ForensicAgent
+from agents.forensic_agent import (
+    ForensicAgent,
+    NEAR_THRESHOLD_CENTS,
+    REPORTING_THRESHOLD_CENTS,
+    ROUND_UNIT_CENTS,
+    aggregate_account_codes,
+    factorize_accounts,
+    structuring_mask,
+)
 from agents.legal_agent import LegalAgent
 from agents.report_agent import ReportAgent
 from services.search_service import SanctionsSearcher, PolicySearcher
 from services.content_safety import ContentSafetyService
-from typing import Dict, List
+from typing import AsyncIterator, Awaitable, Dict, List
+from dataclasses import dataclass
 from datetime import datetime
+from functools import cached_property
+from operator import methodcaller
+import asyncio
 import json
+import re
+
+import numpy as np
+
+# Jurisdictions flagged by the heuristic high-risk screen, matched as
+# case-insensitive substrings of the country. They are compiled into one
+# alternation, with any run of whitespace (or none) accepted between words.
+HIGH_RISK_COUNTRIES = ("iran", "north korea", "syria", "russia")
+_HIGH_RISK_COUNTRY_PATTERN = re.compile(
+    "|".join(re.escape(c).replace(r"\ ", r"\s*") for c in HIGH_RISK_COUNTRIES),
+    re.IGNORECASE
+)
+
+_get_amount = methodcaller("get", "amount", 0)
+_get_country = methodcaller("get", "country", "")
+_get_account = methodcaller("get", "account_id", "unknown")
+
+
+@dataclass(slots=True)
+class TransactionColumns:
+    """
+    Column-oriented view of the fields read by the heuristic screens.
+    
+    Each field is pulled out of the transaction dicts once per batch into a
+    contiguous array, with amounts also held as int64 cents and account ids
+    factorized to integer codes, so every screen is a vectorized pass over
+    shared columns instead of a re-read of the dicts.
+    """
+    amounts: np.ndarray
+    cents: np.ndarray
+    countries: List[str]
+    account_labels: List
+    account_codes: np.ndarray
+    
+    @classmethod
+    def from_transactions(cls, transactions: List[Dict]) -> "TransactionColumns":
+        amounts = np.fromiter(map(_get_amount, transactions), dtype=np.float64,
+                              count=len(transactions))
+        account_labels, account_codes = factorize_accounts(list(map(_get_account, transactions)))
+        return cls(
+            amounts=amounts,
+            # Integer cents keep the threshold and round-number tests exact
+            cents=np.rint(amounts * 100).astype(np.int64),
+            countries=[c if isinstance(c, str) else "" for c in map(_get_country, transactions)],
+            account_labels=account_labels,
+            account_codes=account_codes
+        )
 
 
 class KYTOrchestrator:
@@ -14,29 +73,53 @@ class KYTOrchestrator:
     Coordinates the three specialized agents and services.
     """
     
+    # Transaction fields naming parties that are screened against sanctions lists
+    ENTITY_FIELDS = ("sender_name", "receiver_name", "counterparty", "beneficiary")
+    
     def __init__(self):
-        # Initialize services
-        self.sanctions_searcher = SanctionsSearcher()
-        self.policy_searcher = PolicySearcher()
-        self.content_safety = ContentSafetyService()
-        
-        # Initialize agents
-        self.forensic_agent = ForensicAgent()
-        self.legal_agent = LegalAgent(
-            sanctions_searcher=self.sanctions_searcher,
-            policy_searcher=self.policy_searcher
-        )
-        self.report_agent = ReportAgent()
+        # Services and agents are created on first use (see the properties
+        # below), so callers that only read analysis history never pay for
+        # LLM and Azure client setup
         
         # Analysis state
         self.current_analysis = None
         self.analysis_history = []
     
+    # Services
+    @cached_property
+    def sanctions_searcher(self) -> SanctionsSearcher:
+        return SanctionsSearcher()
+    
+    @cached_property
+    def policy_searcher(self) -> PolicySearcher:
+        return PolicySearcher()
+    
+    @cached_property
+    def content_safety(self) -> ContentSafetyService:
+        return ContentSafetyService()
+    
+    # Agents
+    @cached_property
+    def forensic_agent(self) -> ForensicAgent:
+        return ForensicAgent()
+    
+    @cached_property
+    def legal_agent(self) -> LegalAgent:
+        return LegalAgent(
+            sanctions_searcher=self.sanctions_searcher,
+            policy_searcher=self.policy_searcher
+        )
+    
+    @cached_property
+    def report_agent(self) -> ReportAgent:
+        return ReportAgent()
+    
     def analyze_transactions(self, transactions: List[Dict], 
                             callback=None) -> Dict:
         """
         Main entry point for transaction analysis.
-        Orchestrates all three agents in sequence.
+        Synchronous wrapper around analyze_transactions_async for callers
+        without an event loop.
         
         Args:
             transactions: List of transaction dictionaries to analyze
@@ -45,6 +128,42 @@ class KYTOrchestrator:
         Returns:
             Complete analysis results including all agent outputs
         """
+        return asyncio.run(self.analyze_transactions_async(transactions, callback))
+    
+    async def analyze_transactions_async(self, transactions: List[Dict],
+                                         callback=None) -> Dict:
+        """
+        Orchestrate all three agents, running independent stages concurrently.
+        Consumes stream_analysis and assembles the complete results.
+        
+        Args:
+            transactions: List of transaction dictionaries to analyze
+            callback: Optional callback function for progress updates
+            
+        Returns:
+            Complete analysis results including all agent outputs
+        """
+        async for _ in self.stream_analysis(transactions, callback):
+            pass
+        
+        return self._compile_final_results()
+    
+    async def stream_analysis(self, transactions: List[Dict],
+                              callback=None) -> AsyncIterator[Dict]:
+        """
+        Run the analysis, yielding each stage's results as soon as it completes.
+        
+        Forensic analysis and compliance evaluation both work from the raw
+        transactions, so they run together. The bias check and the report
+        depend only on those two results, so they run together afterwards.
+        Each item is {"stage": name, "result": results}; the last one is the
+        "summary" stage, so consumers that only need the summary can skip
+        building the full results.
+        
+        Args:
+            transactions: List of transaction dictionaries to analyze
+            callback: Optional callback function for progress updates
+        """
         analysis_id = f"KYT-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
         
         self.current_analysis = {
@@ -54,125 +173,135 @@ class KYTOrchestrator:
             "transactions_count": len(transactions),
             "stages": {}
         }
+        stages = self.current_analysis["stages"]
         
         try:
-            # Stage 1: Forensic Analysis
-            if callback:
-                callback("Starting forensic analysis...", 0.1)
-            
-            forensic_results = self._run_forensic_analysis(transactions)
-            self.current_analysis["stages"]["forensic"] = {
-                "status": "COMPLETED",
-                "results": forensic_results
-            }
-            
+            # Stages 1 and 2: Forensic Analysis and Legal/Compliance Evaluation
             if callback:
-                callback("Forensic analysis complete", 0.35)
-            
-            # Stage 2: Legal/Compliance Evaluation
-            if callback:
-                callback("Starting compliance evaluation...", 0.4)
+                callback("Starting forensic analysis and compliance evaluation...", 0.1)
             
             # Extract entities for sanctions checking
             entities = self._extract_entities(transactions)
-            compliance_results = self._run_compliance_evaluation(transactions, entities)
-            self.current_analysis["stages"]["compliance"] = {
-                "status": "COMPLETED",
-                "results": compliance_results
-            }
+            async for stage, results in self._as_completed({
+                "forensic": self._run_forensic_analysis_async(transactions),
+                "compliance": self._run_compliance_evaluation_async(transactions, entities)
+            }):
+                stages[stage] = {"status": "COMPLETED", "results": results}
+                yield {"stage": stage, "result": results}
             
             if callback:
-                callback("Compliance evaluation complete", 0.65)
+                callback("Forensic analysis and compliance evaluation complete", 0.65)
             
-            # Stage 3: Content Safety / Bias Check
+            # Stages 3 and 4: Content Safety / Bias Check and Report Generation
             if callback:
-                callback("Running responsible AI checks...", 0.7)
+                callback("Running responsible AI checks and generating audit report...", 0.7)
             
+            forensic_results = stages["forensic"]["results"]
+            compliance_results = stages["compliance"]["results"]
             decisions = self._prepare_decisions_for_bias_check(
                 forensic_results, compliance_results
             )
-            bias_check_results = self.content_safety.generate_responsible_ai_report(decisions)
-            self.current_analysis["stages"]["bias_check"] = {
-                "status": "COMPLETED",
-                "results": bias_check_results
-            }
-            
-            if callback:
-                callback("Responsible AI checks complete", 0.8)
-            
-            # Stage 4: Report Generation
-            if callback:
-                callback("Generating audit report...", 0.85)
-            
-            report_results = self._generate_report(
-                forensic_results, compliance_results, transactions
-            )
-            self.current_analysis["stages"]["report"] = {
-                "status": "COMPLETED",
-                "results": report_results
-            }
+            async for stage, results in self._as_completed({
+                "bias_check": self.content_safety.generate_responsible_ai_report_async(decisions),
+                "report": self._generate_report_async(forensic_results, compliance_results, transactions)
+            }):
+                stages[stage] = {"status": "COMPLETED", "results": results}
+                yield {"stage": stage, "result": results}
             
             if callback:
-                callback("Report generation complete", 0.95)
+                callback("Responsible AI checks and report generation complete", 0.95)
             
             # Finalize analysis
             self.current_analysis["status"] = "COMPLETED"
             self.current_analysis["completed_at"] = datetime.utcnow().isoformat()
             
-            # Store in history
-            self.analysis_history.append(self.current_analysis.copy())
+            # Store in history. Each run builds a fresh analysis dict, so the
+            # entry can be shared with current_analysis instead of copied
+            self.analysis_history.append(self.current_analysis)
             
             if callback:
                 callback("Analysis complete!", 1.0)
             
-            return self._compile_final_results()
-            
         except Exception as e:
             self.current_analysis["status"] = "FAILED"
             self.current_analysis["error"] = str(e)
             raise
+        
+        yield {"stage": "summary", "result": self._generate_summary()}
+    
+    @staticmethod
+    async def _as_completed(coros: Dict[str, Awaitable]) -> AsyncIterator[tuple]:
+        """Run named coroutines concurrently, yielding (name, result) as each finishes."""
+        tasks = {asyncio.ensure_future(coro): name for name, coro in coros.items()}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield tasks[task], task.result()
+        finally:
+            # A consumer that stops early must not leave stages running
+            for task in pending:
+                task.cancel()
     
-    def _run_forensic_analysis(self, transactions: List[Dict]) -> Dict:
+    async def _run_forensic_analysis_async(self, transactions: List[Dict]) -> Dict:
         """Run the forensic agent analysis."""
         try:
-            result = self.forensic_agent.analyze(transactions)
+            result = await self.forensic_agent.analyze_async(transactions)
+            columns = TransactionColumns.from_transactions(transactions)
+            high_risk = self._extract_high_risk(transactions, columns)
+            patterns = self._detect_patterns(transactions, columns)
+            # Counts are stored with the results so later stages read them
+            # instead of re-deriving them from the lists
             return {
                 "raw_output": result.get("output", ""),
-                "high_risk_transactions": self._extract_high_risk(transactions),
-                "patterns_detected": self._detect_patterns(transactions)
+                "high_risk_transactions": high_risk,
+                "high_risk_count": len(high_risk),
+                "patterns_detected": patterns,
+                "patterns_count": len(patterns)
             }
         except Exception as e:
-            return {"error": str(e), "high_risk_transactions": [], "patterns_detected": []}
+            return {"error": str(e), "high_risk_transactions": [], "high_risk_count": 0,
+                    "patterns_detected": [], "patterns_count": 0}
     
-    def _run_compliance_evaluation(self, transactions: List[Dict], 
-                                   entities: List[str]) -> Dict:
-        """Run the legal/compliance agent evaluation."""
+    async def _run_compliance_evaluation_async(self, transactions: List[Dict],
+                                               entities: List[str]) -> Dict:
+        """
+        Run the legal/compliance agent evaluation.
+        The agent call and the direct sanctions searches are independent, so
+        the searches are awaited alongside the agent.
+        """
         try:
-            result = self.legal_agent.evaluate(transactions, entities)
-            
-            # Run sanctions checks
-            sanctions_matches = []
-            for entity in entities:
-                matches = self.sanctions_searcher.search(entity)
-                if matches:
-                    # Filter out error entries and results without a name
-                    valid_matches = [m for m in matches if "error" not in m and m.get("name")]
-                    sanctions_matches.extend(valid_matches)
+            result, sanctions_matches = await asyncio.gather(
+                self.legal_agent.evaluate_async(transactions, entities),
+                self._search_sanctions_async(entities)
+            )
             
             return {
                 "raw_output": result.get("output", ""),
                 "sanctions_matches": sanctions_matches,
+                "sanctions_count": len(sanctions_matches),
                 "compliance_status": "REVIEW_NEEDED" if sanctions_matches else "PASSED"
             }
         except Exception as e:
-            return {"error": str(e), "sanctions_matches": [], "compliance_status": "ERROR"}
+            return {"error": str(e), "sanctions_matches": [], "sanctions_count": 0,
+                    "compliance_status": "ERROR"}
+    
+    async def _search_sanctions_async(self, entities: List[str]) -> List[Dict]:
+        """Run sanctions checks for every entity, keeping only valid matches."""
+        matches_by_entity = await self.sanctions_searcher.search_many_async(entities)
+        # Filter out error entries and results without a name
+        return [
+            m for matches in matches_by_entity.values() for m in matches
+            if "error" not in m and m.get("name")
+        ]
     
-    def _generate_report(self, forensic_results: Dict, 
-                        compliance_results: Dict,
-                        transactions: List[Dict]) -> Dict:
+    async def _generate_report_async(self, forensic_results: Dict,
+                                     compliance_results: Dict,
+                                     transactions: List[Dict]) -> Dict:
         """Generate the final audit report."""
         try:
-            result = self.report_agent.generate_report(
+            result = await self.report_agent.generate_report_async(
                 forensic_results, compliance_results, transactions
             )
             return {
@@ -186,81 +315,86 @@ class KYTOrchestrator:
         """Extract entity names from transactions for sanctions checking."""
         entities = set()
         for txn in transactions:
-            if "sender_name" in txn:
-                entities.add(txn["sender_name"])
-            if "receiver_name" in txn:
-                entities.add(txn["receiver_name"])
-            if "counterparty" in txn:
-                entities.add(txn["counterparty"])
-            if "beneficiary" in txn:
-                entities.add(txn["beneficiary"])
+            # Empty or missing names have nothing to screen
+            entities.update(v for key in self.ENTITY_FIELDS if (v := txn.get(key)))
         return list(entities)
     
-    def _extract_high_risk(self, transactions: List[Dict]) -> List[Dict]:
-        """Extract high-risk transactions based on simple heuristics."""
+    def _extract_high_risk(self, transactions: List[Dict],
+                           columns: TransactionColumns = None) -> List[Dict]:
+        """
+        Extract high-risk transactions based on simple heuristics.
+        Rules are evaluated as masks over the whole batch; dicts are only
+        built for the flagged rows.
+        """
+        n = len(transactions)
+        if not n:
+            return []
+        if columns is None:
+            columns = TransactionColumns.from_transactions(transactions)
+        
+        cents = columns.cents
+        countries = columns.countries
+        
+        # Check amount thresholds
+        at_threshold = cents >= REPORTING_THRESHOLD_CENTS
+        near_threshold = (cents >= NEAR_THRESHOLD_CENTS) & ~at_threshold
+        # Check for round numbers
+        round_number = (cents > ROUND_UNIT_CENTS) & (cents % ROUND_UNIT_CENTS == 0)
+        # Check jurisdiction
+        high_risk_country = np.fromiter(
+            (_HIGH_RISK_COUNTRY_PATTERN.search(c) is not None for c in countries),
+            dtype=bool, count=n
+        )
+        
+        scores = at_threshold * 3 + near_threshold * 5 + round_number * 2 + high_risk_country * 5
+        
         high_risk = []
-        for txn in transactions:
-            risk_score = 0
+        for i in np.flatnonzero(scores >= 5).tolist():
             reasons = []
-            
-            amount = txn.get("amount", 0)
-            
-            # Check amount thresholds
-            if amount >= 10000:
-                risk_score += 3
+            if at_threshold[i]:
                 reasons.append("Amount >= $10,000")
-            elif 9000 <= amount < 10000:
-                risk_score += 5
+            elif near_threshold[i]:
                 reasons.append("Amount just below $10,000 threshold")
-            
-            # Check for round numbers
-            if amount > 1000 and amount % 1000 == 0:
-                risk_score += 2
+            if round_number[i]:
                 reasons.append("Round number amount")
+            if high_risk_country[i]:
+                reasons.append(f"High-risk jurisdiction: {countries[i].lower()}")
             
-            # Check jurisdiction
-            country = txn.get("country", "").lower()
-            high_risk_countries = ["iran", "north korea", "syria", "russia"]
-            if any(c in country for c in high_risk_countries):
-                risk_score += 5
-                reasons.append(f"High-risk jurisdiction: {country}")
-            
-            if risk_score >= 5:
-                high_risk.append({
-                    **txn,
-                    "risk_score": min(risk_score, 10),
-                    "risk_reasons": reasons
-                })
+            high_risk.append({
+                **transactions[i],
+                "risk_score": min(int(scores[i]), 10),
+                "risk_reasons": reasons
+            })
         
         return high_risk
     
-    def _detect_patterns(self, transactions: List[Dict]) -> List[Dict]:
-        """Detect suspicious patterns across transactions."""
-        patterns = []
+    def _detect_patterns(self, transactions: List[Dict],
+                         columns: TransactionColumns = None) -> List[Dict]:
+        """
+        Detect suspicious patterns across transactions.
+        Accounts are grouped with the forensic agent's vectorized per-account
+        aggregation, so only flagged accounts are handled in Python.
+        """
+        if columns is None:
+            columns = TransactionColumns.from_transactions(transactions)
         
         # Group by account
-        account_transactions = {}
-        for txn in transactions:
-            account = txn.get("account_id", "unknown")
-            if account not in account_transactions:
-                account_transactions[account] = []
-            account_transactions[account].append(txn)
+        accounts = columns.account_labels
+        counts, totals, maxes = aggregate_account_codes(
+            columns.account_codes, columns.amounts, len(accounts)
+        )
         
         # Check for structuring
-        for account, txns in account_transactions.items():
-            if len(txns) >= 3:
-                amounts = [t.get("amount", 0) for t in txns]
-                total = sum(amounts)
-                if total > 10000 and all(a < 10000 for a in amounts):
-                    patterns.append({
-                        "type": "POTENTIAL_STRUCTURING",
-                        "account": account,
-                        "transaction_count": len(txns),
-                        "total_amount": total,
-                        "severity": "HIGH"
-                    })
-        
-        return patterns
+        return [
+            {
+                "type": "POTENTIAL_STRUCTURING",
+                "account": accounts[i],
+                "transaction_count": int(counts[i]),
+                "total_amount": float(totals[i]),
+                "severity": "HIGH"
+            }
+            for i in np.flatnonzero(structuring_mask(counts, totals, maxes)).tolist()
+        ]
     
     def _prepare_decisions_for_bias_check(self, forensic_results: Dict,
                                           compliance_results: Dict) -> List[Dict]:
@@ -289,30 +423,53 @@ class KYTOrchestrator:
         
         return decisions if decisions else [{"decision_type": "NO_ALERTS", "reasoning": "No suspicious activity detected"}]
     
+    def _stage_results(self, stage: str) -> Dict:
+        """Results of a stage of the current analysis, or {} if it has none."""
+        return self.current_analysis["stages"].get(stage, {}).get("results", {})
+    
     def _compile_final_results(self) -> Dict:
         """Compile all results into a final output structure."""
+        forensic = self._stage_results("forensic")
+        compliance = self._stage_results("compliance")
+        bias = self._stage_results("bias_check")
+        
         return {
             "analysis_id": self.current_analysis["id"],
             "status": self.current_analysis["status"],
             "started_at": self.current_analysis["started_at"],
             "completed_at": self.current_analysis.get("completed_at"),
             "transactions_analyzed": self.current_analysis["transactions_count"],
-            "forensic_analysis": self.current_analysis["stages"].get("forensic", {}).get("results", {}),
-            "compliance_evaluation": self.current_analysis["stages"].get("compliance", {}).get("results", {}),
-            "responsible_ai": self.current_analysis["stages"].get("bias_check", {}).get("results", {}),
-            "audit_report": self.current_analysis["stages"].get("report", {}).get("results", {}),
-            "summary": self._generate_summary()
+            "forensic_analysis": forensic,
+            "compliance_evaluation": compliance,
+            "responsible_ai": bias,
+            "audit_report": self._stage_results("report"),
+            "summary": self._generate_summary(forensic, compliance, bias)
         }
     
-    def _generate_summary(self) -> Dict:
-        """Generate an executive summary of the analysis."""
-        forensic = self.current_analysis["stages"].get("forensic", {}).get("results", {})
-        compliance = self.current_analysis["stages"].get("compliance", {}).get("results", {})
-        bias = self.current_analysis["stages"].get("bias_check", {}).get("results", {})
+    @staticmethod
+    def _stored_count(results: Dict, count_key: str, items_key: str) -> int:
+        """
+        The count a stage stored with its results. The items are only
+        measured for results that predate stored counts.
+        """
+        count = results.get(count_key)
+        if count is None:
+            count = len(results.get(items_key, []))
+        return count
+    
+    def _generate_summary(self, forensic: Dict = None, compliance: Dict = None,
+                          bias: Dict = None) -> Dict:
+        """
+        Generate an executive summary of the analysis.
+        Stage results already fetched by the caller can be passed in.
+        """
+        forensic = self._stage_results("forensic") if forensic is None else forensic
+        compliance = self._stage_results("compliance") if compliance is None else compliance
+        bias = self._stage_results("bias_check") if bias is None else bias
         
-        high_risk_count = len(forensic.get("high_risk_transactions", []))
-        sanctions_count = len(compliance.get("sanctions_matches", []))
-        patterns_count = len(forensic.get("patterns_detected", []))
+        high_risk_count = self._stored_count(forensic, "high_risk_count", "high_risk_transactions")
+        sanctions_count = self._stored_count(compliance, "sanctions_count", "sanctions_matches")
+        patterns_count = self._stored_count(forensic, "patterns_count", "patterns_detected")
         
         overall_risk = "HIGH" if (sanctions_count > 0 or patterns_count > 0) else \
                        "MEDIUM" if high_risk_count > 0 else "LOW"
@@ -1,4 +1,4 @@
-from .search_service import SanctionsSearcher, PolicySearcher
+from .search_service import SanctionsSearcher, PolicySearcher, initialize_all_indexes
 from .content_safety import ContentSafetyService
 
-__all__ = ["SanctionsSearcher", "PolicySearcher", "ContentSafetyService"]
+__all__ = ["SanctionsSearcher", "PolicySearcher", "ContentSafetyService", "initialize_all_indexes"]
@@ -1,19 +1,361 @@
-from azure.search.documents import SearchClient
-from azure.search.documents.indexes import SearchIndexClient
-from azure.search.documents.indexes.models import (
-    SearchIndex,
-    SimpleField,
-    SearchableField,
-    SearchFieldDataType,
-    VectorSearch,
-    HnswAlgorithmConfiguration,
-    VectorSearchProfile,
-)
 from azure.core.credentials import AzureKeyCredential
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import bisect
+import functools
+import itertools
+import logging
+import math
 import os
-from typing import List, Dict
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
 import json
 
+if TYPE_CHECKING:
+    from azure.search.documents import SearchClient
+    from azure.search.documents.aio import SearchClient as AsyncSearchClient
+    from azure.search.documents.indexes import SearchIndexClient
+
+logger = logging.getLogger(__name__)
+
+
+# Sample sanctions entries and policies served when Azure AI Search is not
+# configured. Their lowercased search fields are computed once here, so mock
+# searches only lowercase the query.
+_MOCK_SANCTIONS = [
+    {
+        "id": "SDN-001",
+        "name": "ACME Shell Corporation",
+        "aliases": ["ACME Holdings", "ACME LLC"],
+        "sanctions_list": "OFAC SDN",
+        "country": "Unknown",
+        "score": 0.95
+    },
+    {
+        "id": "SDN-002",
+        "name": "Offshore Trust Ltd",
+        "aliases": ["OT Limited", "Offshore Holdings"],
+        "sanctions_list": "OFAC SDN",
+        "country": "Cayman Islands",
+        "score": 0.88
+    }
+]
+# Lowercased search fields as columns parallel to _MOCK_SANCTIONS
+_MOCK_SANCTIONS_NAMES_LOWER = [record["name"].lower() for record in _MOCK_SANCTIONS]
+_MOCK_SANCTIONS_ALIASES_LOWER = [
+    tuple(a.lower() for a in record.get("aliases", [])) for record in _MOCK_SANCTIONS
+]
+
+_MOCK_POLICIES = [
+    {
+        "id": "POL-001",
+        "title": "Currency Transaction Report (CTR) Requirements",
+        "content": "Financial institutions must file a CTR for each deposit, withdrawal, exchange of currency, or other payment or transfer that involves a transaction in currency of more than $10,000.",
+        "category": "BSA",
+        "regulation": "31 CFR 1010.311",
+        "relevance_score": 0.95
+    },
+    {
+        "id": "POL-002",
+        "title": "Suspicious Activity Report (SAR) Requirements",
+        "content": "Banks must report any suspicious transaction relevant to a possible violation of law or regulation. This includes any transaction conducted or attempted that involves funds derived from illegal activities.",
+        "category": "BSA",
+        "regulation": "31 CFR 1020.320",
+        "relevance_score": 0.90
+    },
+    {
+        "id": "POL-003",
+        "title": "Enhanced Due Diligence (EDD) Requirements",
+        "content": "Enhanced due diligence is required for high-risk customers, including PEPs, customers from high-risk jurisdictions, and those with complex ownership structures.",
+        "category": "AML",
+        "regulation": "31 CFR 1010.610",
+        "relevance_score": 0.85
+    }
+]
+
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of text."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _index_tokens(texts: Iterable[str]) -> Dict[str, List[int]]:
+    """Map each token to the indices of the texts containing it."""
+    by_token: Dict[str, List[int]] = {}
+    for index, text in enumerate(texts):
+        for token in set(_tokenize(text)):
+            by_token.setdefault(token, []).append(index)
+    return by_token
+
+
+# Mock policy lookups: each title and content token maps to the policies
+# containing it, so a query costs one dict lookup per query token
+_MOCK_POLICIES_BY_TOKEN = _index_tokens(
+    f"{record['title']} {record['content']}" for record in _MOCK_POLICIES
+)
+
+
+def _levenshtein(a: str, b: str) -> int:
+    """Edit distance between two strings (insertions, deletions, substitutions)."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class _BKTree:
+    """
+    BK-tree over strings under edit distance.
+    A lookup within tolerance t only descends into children whose edge
+    distance is within t of the node's distance to the query (triangle
+    inequality), so most terms are never compared.
+    """
+    
+    def __init__(self, terms: Iterable[str]):
+        # Nodes are (term, {edge distance: child node})
+        self._root: Optional[Tuple[str, Dict]] = None
+        for term in terms:
+            self.add(term)
+    
+    def add(self, term: str) -> None:
+        """Insert a term; duplicates are ignored."""
+        if self._root is None:
+            self._root = (term, {})
+            return
+        node = self._root
+        while True:
+            distance = _levenshtein(term, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (term, {})
+                return
+            node = child
+    
+    def search(self, query: str, tolerance: int) -> List[str]:
+        """Return every term within tolerance edits of query."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            term, children = stack.pop()
+            distance = _levenshtein(query, term)
+            if distance <= tolerance:
+                found.append(term)
+            stack.extend(
+                child for edge, child in children.items()
+                if distance - tolerance <= edge <= distance + tolerance
+            )
+        return found
+
+
+def _index_terms(names: List[str], aliases: List[Tuple[str, ...]]) -> Dict[str, List[int]]:
+    """Map each name and alias to the indices of the records it belongs to, in one pass."""
+    by_term: Dict[str, List[int]] = {}
+    for index, (name, record_aliases) in enumerate(zip(names, aliases)):
+        # A record is listed once per term, even if its name is also an alias
+        for term in dict.fromkeys((name, *record_aliases)):
+            by_term.setdefault(term, []).append(index)
+    return by_term
+
+
+# Mock sanctions lookups: every lowercased name and alias maps to the records
+# it belongs to, serving exact queries directly, and a BK-tree over those
+# terms finds the ones within MOCK_FUZZY_TOLERANCE edits of a query. Shorter
+# queries are matched by substring only, since a couple of edits would match
+# almost anything.
+MOCK_FUZZY_TOLERANCE = 2
+MOCK_FUZZY_MIN_LENGTH = 5
+
+_MOCK_SANCTIONS_BY_TERM = _index_terms(_MOCK_SANCTIONS_NAMES_LOWER, _MOCK_SANCTIONS_ALIASES_LOWER)
+_MOCK_SANCTIONS_TREE = _BKTree(_MOCK_SANCTIONS_BY_TERM)
+
+# Partial-name matching runs over every term joined into one newline-separated
+# string, so a query is one str.find pass in C rather than a Python loop over
+# names and aliases; hit offsets map back to terms through their start offsets
+_MOCK_SANCTIONS_TERMS = list(_MOCK_SANCTIONS_BY_TERM)
+_MOCK_SANCTIONS_TERM_TEXT = "\n".join(_MOCK_SANCTIONS_TERMS)
+_MOCK_SANCTIONS_TERM_STARTS = list(
+    itertools.accumulate((len(t) + 1 for t in _MOCK_SANCTIONS_TERMS[:-1]), initial=0)
+)
+
+
+def _mock_sanctions_containing(query_lower: str) -> set:
+    """Indices of mock sanctions records with a name or alias containing the query."""
+    hits = set()
+    if "\n" in query_lower:
+        return hits
+    pos = _MOCK_SANCTIONS_TERM_TEXT.find(query_lower)
+    while pos != -1:
+        term_index = bisect.bisect_right(_MOCK_SANCTIONS_TERM_STARTS, pos) - 1
+        hits.update(_MOCK_SANCTIONS_BY_TERM[_MOCK_SANCTIONS_TERMS[term_index]])
+        # Resume at the next term; one hit per term is enough
+        if term_index + 1 == len(_MOCK_SANCTIONS_TERMS):
+            break
+        pos = _MOCK_SANCTIONS_TERM_TEXT.find(query_lower, _MOCK_SANCTIONS_TERM_STARTS[term_index + 1])
+    return hits
+
+
+@functools.lru_cache(maxsize=None)
+def _search_sdk() -> SimpleNamespace:
+    """
+    The Azure AI Search SDK classes, imported on first use.
+    The SDK pulls in a large dependency graph that mock mode (no endpoint
+    configured) never needs, so it is not loaded with this module.
+    """
+    from azure.search.documents import SearchClient, SearchIndexingBufferedSender
+    from azure.search.documents.aio import SearchClient as AsyncSearchClient
+    from azure.search.documents.indexes import SearchIndexClient
+    from azure.search.documents.indexes.models import (
+        SearchIndex,
+        SimpleField,
+        SearchableField,
+        SearchFieldDataType,
+    )
+    return SimpleNamespace(
+        SearchClient=SearchClient,
+        SearchIndexingBufferedSender=SearchIndexingBufferedSender,
+        AsyncSearchClient=AsyncSearchClient,
+        SearchIndexClient=SearchIndexClient,
+        SearchIndex=SearchIndex,
+        SimpleField=SimpleField,
+        SearchableField=SearchableField,
+        SearchFieldDataType=SearchFieldDataType,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_search_client(endpoint: str, key: str, index_name: str) -> "SearchClient":
+    """
+    Return the sync search client for an index.
+    One client, and so one pooled HTTP session, is shared by every searcher
+    for the same endpoint and index, so new searchers reuse warm connections
+    instead of paying a TCP and TLS handshake.
+    """
+    return _search_sdk().SearchClient(
+        endpoint=endpoint,
+        index_name=index_name,
+        credential=AzureKeyCredential(key)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_index_client(endpoint: str, key: str) -> "SearchIndexClient":
+    """Return the index management client for an endpoint, shared like _get_search_client."""
+    return _search_sdk().SearchIndexClient(
+        endpoint=endpoint,
+        credential=AzureKeyCredential(key)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _search_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    Return the worker pool for concurrent searches, shared by every searcher
+    in the process. Threads are started on first use and exit with the
+    interpreter, so idle searchers hold no threads of their own.
+    """
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sanctions-search")
+
+
+# Policy categories in the policies index, for use as PolicySearcher filters
+POLICY_CATEGORIES = ("BSA", "AML", "KYC")
+
+
+@functools.lru_cache(maxsize=64)
+def _category_filter(category: str) -> str:
+    """
+    OData filter matching one policy category.
+    Quotes are escaped by doubling, so a category containing one cannot
+    break out of the string literal. Filters are memoized, so repeat
+    searches send an identical filter string.
+    """
+    escaped = category.replace("'", "''")
+    return f"category eq '{escaped}'"
+
+
+# Shared encoder for measuring upload documents; json.dumps would build a new
+# encoder on every call because of the default= argument
+_DOCUMENT_ENCODER = json.JSONEncoder(default=str)
+
+
+def _batch_documents(documents: List[Dict], max_count: int,
+                     max_bytes: int) -> Tuple[List[List[Dict]], List[Dict]]:
+    """
+    Split documents into batches of at most max_count documents and about
+    max_bytes of JSON each, measured as each document is added. Documents
+    too large to fit any batch are returned separately rather than sent.
+    """
+    batches, oversized = [], []
+    batch, batch_bytes = [], 0
+    for document in documents:
+        # ensure_ascii (the default) makes the str length the byte length
+        size = len(_DOCUMENT_ENCODER.encode(document))
+        if size > max_bytes:
+            oversized.append(document)
+            continue
+        if len(batch) == max_count or batch_bytes + size > max_bytes:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(document)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches, oversized
+
+
+class _SearchCache:
+    """
+    Bounded LRU cache of search results with a time-to-live.
+    Thread-safe, so concurrent searches can share one cache.
+    """
+    
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[List[Dict]]:
+        """Return the cached results for key, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, results = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return results
+    
+    def put(self, key: Hashable, results: List[Dict]) -> None:
+        """Cache results for key, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
 
 class SanctionsSearcher:
     """
@@ -22,6 +364,24 @@ class SanctionsSearcher:
     """
     
     INDEX_NAME = "sanctions-index"
+    # Search results are reused for repeat queries until they expire or the
+    # list is re-uploaded
+    CACHE_SIZE = 10_000
+    CACHE_TTL_SECONDS = 3600
+    # Upper bound on concurrent search requests issued by search_many and
+    # search_many_async
+    MAX_SEARCH_WORKERS = 16
+    # Documents per indexing request; 1000 is the service's batch maximum
+    UPLOAD_BATCH_SIZE = 1000
+    # Serialized bytes per indexing request; the service rejects requests
+    # over 16 MB, so this leaves headroom for the request envelope
+    UPLOAD_MAX_BYTES = 14_000_000
+    # Buffered senders uploading batches in parallel
+    UPLOAD_WORKERS = 4
+    # Only the fields returned in matches are transferred
+    SELECT_FIELDS = ["id", "name", "aliases", "sanctions_list", "country"]
+    # Search scores above this are reported as exact matches, others as fuzzy
+    EXACT_SCORE_THRESHOLD = 10.0
     
     def __init__(self):
         self.endpoint = os.getenv("AZURE_SEARCH_ENDPOINT")
@@ -29,25 +389,29 @@ class SanctionsSearcher:
         self.credential = AzureKeyCredential(self.key) if self.key else None
         
         if self.endpoint and self.credential:
-            self.search_client = SearchClient(
-                endpoint=self.endpoint,
-                index_name=self.INDEX_NAME,
-                credential=self.credential
-            )
-            self.index_client = SearchIndexClient(
-                endpoint=self.endpoint,
-                credential=self.credential
-            )
+            self.search_client = _get_search_client(self.endpoint, self.key, self.INDEX_NAME)
+            self.index_client = _get_index_client(self.endpoint, self.key)
         else:
             self.search_client = None
             self.index_client = None
-    
-    def create_index(self):
-        """Create the sanctions search index if it doesn't exist."""
-        if not self.index_client:
-            return {"error": "Search client not initialized"}
         
-        fields = [
+        self._cache = _SearchCache(self.CACHE_SIZE, self.CACHE_TTL_SECONDS)
+    
+    def invalidate_cache(self):
+        """Discard cached search results, e.g. after the sanctions list changes."""
+        self._cache.clear()
+    
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _index_fields(cls) -> List:
+        """
+        The index field schema. It is static, so it is built once per class,
+        on first use since the SDK models are imported lazily.
+        """
+        sdk = _search_sdk()
+        SimpleField, SearchableField = sdk.SimpleField, sdk.SearchableField
+        SearchFieldDataType = sdk.SearchFieldDataType
+        return [
             SimpleField(name="id", type=SearchFieldDataType.String, key=True),
             SearchableField(name="name", type=SearchFieldDataType.String, analyzer_name="en.microsoft"),
             SearchableField(name="aliases", type=SearchFieldDataType.Collection(SearchFieldDataType.String)),
@@ -57,8 +421,13 @@ class SanctionsSearcher:
             SimpleField(name="date_added", type=SearchFieldDataType.DateTimeOffset),
             SearchableField(name="details", type=SearchFieldDataType.String),
         ]
+    
+    def create_index(self):
+        """Create the sanctions search index if it doesn't exist."""
+        if not self.index_client:
+            return {"error": "Search client not initialized"}
         
-        index = SearchIndex(name=self.INDEX_NAME, fields=fields)
+        index = _search_sdk().SearchIndex(name=self.INDEX_NAME, fields=self._index_fields())
         
         try:
             self.index_client.create_or_update_index(index)
@@ -67,26 +436,81 @@ class SanctionsSearcher:
             return {"error": str(e)}
     
     def upload_sanctions_data(self, sanctions_data: List[Dict]):
-        """Upload sanctions data to the search index."""
+        """
+        Upload sanctions data to the search index.
+        Documents are split into batches within the service's count and size
+        limits, and the batches are sent by up to UPLOAD_WORKERS buffered
+        senders in parallel, which retry throttled actions with backoff.
+        Documents too large to send, or that still fail, are reported by id.
+        """
         if not self.search_client:
             return {"error": "Search client not initialized"}
         
+        batches, oversized = _batch_documents(
+            sanctions_data, self.UPLOAD_BATCH_SIZE, self.UPLOAD_MAX_BYTES
+        )
+        # on_error is called from the senders' threads
+        failed_ids = [document.get("id") for document in oversized]
+        
+        def upload(worker_batches: List[List[Dict]]):
+            with _search_sdk().SearchIndexingBufferedSender(
+                endpoint=self.endpoint,
+                index_name=self.INDEX_NAME,
+                credential=self.credential,
+                initial_batch_action_count=self.UPLOAD_BATCH_SIZE,
+                on_error=lambda action: failed_ids.append(action.additional_properties.get("id"))
+            ) as sender:
+                for batch in worker_batches:
+                    sender.upload_documents(documents=batch)
+                    # One request per batch, so none exceeds UPLOAD_MAX_BYTES
+                    sender.flush()
+        
+        workers = max(1, min(self.UPLOAD_WORKERS, len(batches)))
         try:
-            result = self.search_client.upload_documents(documents=sanctions_data)
-            return {"status": "success", "uploaded": len(sanctions_data)}
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Consuming the results re-raises any sender exception
+                list(executor.map(upload, [batches[i::workers] for i in range(workers)]))
+            
+            result = {"status": "success", "uploaded": len(sanctions_data) - len(failed_ids)}
+            if failed_ids:
+                result["failed_ids"] = failed_ids
+            return result
         except Exception as e:
             return {"error": str(e)}
+        finally:
+            # Cached results may predate the new documents, even when only
+            # some batches were indexed
+            self.invalidate_cache()
     
     def search(self, query: str, top: int = 5) -> List[Dict]:
         """Search sanctions list for matching entities."""
+        return list(self.search_iter(query, top))
+    
+    def search_iter(self, query: str, top: int = 5) -> Iterator[Dict]:
+        """
+        Yield sanctions matches for a query, best first, as they are read.
+        Results are parsed and the next page fetched only as the caller
+        consumes them, so next(searcher.search_iter(q), None) gets just the
+        top hit. A search is cached once it has been read to the end.
+        If the search fails, possibly after some matches were yielded, an
+        {"error": ...} item is yielded last so callers can tell the results
+        are incomplete.
+        """
         if not self.search_client:
             # Return mock data for demo if not connected
-            return self._mock_search(query)
+            yield from self._mock_search(query)
+            return
+        
+        cached = self._cache.get((query, top))
+        if cached is not None:
+            yield from cached
+            return
         
         try:
             results = self.search_client.search(
                 search_text=query,
                 top=top,
+                select=self.SELECT_FIELDS,
                 include_total_count=True,
                 query_type="full",
                 search_mode="any"
@@ -94,48 +518,141 @@ class SanctionsSearcher:
             
             matches = []
             for result in results:
-                matches.append({
-                    "id": result.get("id"),
-                    "name": result.get("name"),
-                    "aliases": result.get("aliases", []),
-                    "sanctions_list": result.get("sanctions_list"),
-                    "country": result.get("country"),
-                    "score": result.get("@search.score", 0),
-                    "match_type": "EXACT" if result.get("@search.score", 0) > 10 else "FUZZY"
-                })
+                match = self._parse_match(result)
+                matches.append(match)
+                yield match
+        except Exception as e:
+            logger.error("Sanctions search error for '%s': %s", query, e)
+            yield {"error": str(e)}
+            return
+        
+        # Failed or abandoned searches are not cached, so they are retried next time
+        self._cache.put((query, top), matches)
+    
+    async def search_async(self, query: str, top: int = 5,
+                           client: "AsyncSearchClient" = None) -> List[Dict]:
+        """
+        Async variant of search.
+        Uses the given open async client, or a short-lived one if none is given.
+        A failed search returns [{"error": ...}], as search does.
+        """
+        if not self.search_client:
+            return self._mock_search(query)
+        
+        cached = self._cache.get((query, top))
+        if cached is not None:
+            return list(cached)
+        
+        if client is None:
+            async with self._create_async_client() as client:
+                return await self.search_async(query, top, client)
+        
+        try:
+            results = await client.search(
+                search_text=query,
+                top=top,
+                select=self.SELECT_FIELDS,
+                include_total_count=True,
+                query_type="full",
+                search_mode="any"
+            )
             
-            return matches
+            matches = [self._parse_match(result) async for result in results]
+            
+            # Failed searches are not cached, so they are retried next time
+            self._cache.put((query, top), matches)
+            return list(matches)
         except Exception as e:
-            print(f"Sanctions search error for '{query}': {e}")
-            return []
+            logger.error("Sanctions search error for '%s': %s", query, e)
+            return [{"error": str(e)}]
     
-    def _mock_search(self, query: str) -> List[Dict]:
-        """Mock search for demo purposes."""
-        # Sample sanctions entries for demo
-        mock_sanctions = [
-            {
-                "id": "SDN-001",
-                "name": "ACME Shell Corporation",
-                "aliases": ["ACME Holdings", "ACME LLC"],
-                "sanctions_list": "OFAC SDN",
-                "country": "Unknown",
-                "score": 0.95
-            },
-            {
-                "id": "SDN-002",
-                "name": "Offshore Trust Ltd",
-                "aliases": ["OT Limited", "Offshore Holdings"],
-                "sanctions_list": "OFAC SDN",
-                "country": "Cayman Islands",
-                "score": 0.88
-            }
-        ]
+    def _create_async_client(self) -> "AsyncSearchClient":
+        """
+        Create an async client. Its HTTP session is bound to the running event
+        loop, so callers open one per batch with "async with".
+        """
+        return _search_sdk().AsyncSearchClient(
+            endpoint=self.endpoint,
+            index_name=self.INDEX_NAME,
+            credential=self.credential
+        )
+    
+    @classmethod
+    def _parse_match(cls, result: Dict) -> Dict:
+        """Convert a search result into the searcher's match format."""
+        score = result.get("@search.score", 0)
+        return {
+            "id": result.get("id"),
+            "name": result.get("name"),
+            "aliases": result.get("aliases", []),
+            "sanctions_list": result.get("sanctions_list"),
+            "country": result.get("country"),
+            "score": score,
+            "match_type": "EXACT" if score > cls.EXACT_SCORE_THRESHOLD else "FUZZY"
+        }
+    
+    def search_many(self, queries: Iterable[str], top: int = 5) -> Dict[str, List[Dict]]:
+        """
+        Search the sanctions list for several entities at once.
+        Returns matches keyed by query. Duplicate queries are searched once.
+        
+        Azure AI Search has no multi-query endpoint (an OR query cannot be
+        attributed back to individual entities), so each distinct query is
+        still its own request. Against the live service the requests run
+        concurrently on a worker pool, so the batch waits on the slowest
+        round trip rather than on the sum of them.
+        """
+        queries = list(dict.fromkeys(queries))
+        if not self.search_client or len(queries) < 2:
+            return {query: self.search(query, top) for query in queries}
+        
+        executor = _search_executor(self.MAX_SEARCH_WORKERS)
+        return dict(zip(queries, executor.map(lambda q: self.search(q, top), queries)))
+    
+    async def search_many_async(self, queries: Iterable[str], top: int = 5) -> Dict[str, List[Dict]]:
+        """
+        Async variant of search_many.
+        Distinct queries share one async client, and so one connection pool,
+        with at most MAX_SEARCH_WORKERS requests in flight.
+        """
+        queries = list(dict.fromkeys(queries))
+        if not self.search_client:
+            return {query: self._mock_search(query) for query in queries}
         
+        semaphore = asyncio.Semaphore(self.MAX_SEARCH_WORKERS)
+        
+        async with self._create_async_client() as client:
+            async def search(query: str) -> List[Dict]:
+                async with semaphore:
+                    return await self.search_async(query, top, client)
+            
+            results = await asyncio.gather(*[search(q) for q in queries])
+        
+        return dict(zip(queries, results))
+    
+    def _mock_search(self, query: str) -> List[Dict]:
+        """
+        Mock search for demo purposes.
+        Matches partial names and aliases, and full ones with small typos.
+        """
         query_lower = query.lower()
-        matches = [s for s in mock_sanctions if query_lower in s["name"].lower() or 
-                   any(query_lower in a.lower() for a in s.get("aliases", []))]
         
-        return matches
+        # An exact name or alias, the common case for tool calls, is one
+        # dict lookup with no scan
+        exact = _MOCK_SANCTIONS_BY_TERM.get(query_lower)
+        if exact:
+            return [_MOCK_SANCTIONS[i] for i in exact]
+        
+        # Names or aliases within a few edits of the query, via the BK-tree
+        hits = set()
+        if len(query_lower) >= MOCK_FUZZY_MIN_LENGTH:
+            for term in _MOCK_SANCTIONS_TREE.search(query_lower, MOCK_FUZZY_TOLERANCE):
+                hits.update(_MOCK_SANCTIONS_BY_TERM[term])
+        
+        # Names or aliases containing the query
+        hits |= _mock_sanctions_containing(query_lower)
+        
+        return [_MOCK_SANCTIONS[i] for i in sorted(hits)]
 
 
 class PolicySearcher:
@@ -145,6 +662,14 @@ class PolicySearcher:
     """
     
     INDEX_NAME = "policies-index"
+    # Policy lookups repeat across agent tool calls; results are reused until
+    # they expire or the cache is invalidated
+    CACHE_SIZE = 1024
+    CACHE_TTL_SECONDS = 3600
+    # Policy content can run to kilobytes, so searches return the matching
+    # excerpts of it unless full content is asked for
+    SELECT_FIELDS = ["id", "title", "category", "regulation"]
+    SNIPPET_SEPARATOR = " ... "
     
     def __init__(self):
         self.endpoint = os.getenv("AZURE_SEARCH_ENDPOINT")
@@ -152,25 +677,29 @@ class PolicySearcher:
         self.credential = AzureKeyCredential(self.key) if self.key else None
         
         if self.endpoint and self.credential:
-            self.search_client = SearchClient(
-                endpoint=self.endpoint,
-                index_name=self.INDEX_NAME,
-                credential=self.credential
-            )
-            self.index_client = SearchIndexClient(
-                endpoint=self.endpoint,
-                credential=self.credential
-            )
+            self.search_client = _get_search_client(self.endpoint, self.key, self.INDEX_NAME)
+            self.index_client = _get_index_client(self.endpoint, self.key)
         else:
             self.search_client = None
             self.index_client = None
-    
-    def create_index(self):
-        """Create the policy search index if it doesn't exist."""
-        if not self.index_client:
-            return {"error": "Search client not initialized"}
         
-        fields = [
+        self._cache = _SearchCache(self.CACHE_SIZE, self.CACHE_TTL_SECONDS)
+    
+    def invalidate_cache(self):
+        """Discard cached search results, e.g. after policy documents change."""
+        self._cache.clear()
+    
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _index_fields(cls) -> List:
+        """
+        The index field schema. It is static, so it is built once per class,
+        on first use since the SDK models are imported lazily.
+        """
+        sdk = _search_sdk()
+        SimpleField, SearchableField = sdk.SimpleField, sdk.SearchableField
+        SearchFieldDataType = sdk.SearchFieldDataType
+        return [
             SimpleField(name="id", type=SearchFieldDataType.String, key=True),
             SearchableField(name="title", type=SearchFieldDataType.String, analyzer_name="en.microsoft"),
             SearchableField(name="content", type=SearchFieldDataType.String, analyzer_name="en.microsoft"),
@@ -179,8 +708,13 @@ class PolicySearcher:
             SimpleField(name="effective_date", type=SearchFieldDataType.DateTimeOffset),
             SearchableField(name="keywords", type=SearchFieldDataType.Collection(SearchFieldDataType.String)),
         ]
+    
+    def create_index(self):
+        """Create the policy search index if it doesn't exist."""
+        if not self.index_client:
+            return {"error": "Search client not initialized"}
         
-        index = SearchIndex(name=self.INDEX_NAME, fields=fields)
+        index = _search_sdk().SearchIndex(name=self.INDEX_NAME, fields=self._index_fields())
         
         try:
             self.index_client.create_or_update_index(index)
@@ -188,67 +722,144 @@ class PolicySearcher:
         except Exception as e:
             return {"error": str(e)}
     
-    def search(self, query: str, category: str = None, top: int = 5) -> List[Dict]:
-        """Search for relevant compliance policies."""
+    def search(self, query: str, category: str = None, top: int = 5,
+               full_content: bool = False) -> List[Dict]:
+        """
+        Search for relevant compliance policies.
+        Each policy's "content" holds the excerpts matching the query, or the
+        whole document when full_content is set.
+        """
         if not self.search_client:
             return self._mock_search(query)
         
+        key = (query, category, top, full_content)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
         try:
-            filter_expr = f"category eq '{category}'" if category else None
-            
             results = self.search_client.search(
-                search_text=query,
-                filter=filter_expr,
-                top=top,
-                include_total_count=True
+                **self._search_options(query, category, top, full_content)
             )
             
-            policies = []
-            for result in results:
-                policies.append({
-                    "id": result.get("id"),
-                    "title": result.get("title"),
-                    "content": result.get("content"),
-                    "category": result.get("category"),
-                    "regulation": result.get("regulation"),
-                    "relevance_score": result.get("@search.score", 0)
-                })
+            policies = [self._parse_policy(result) for result in results]
             
-            return policies
+            # Failed searches are not cached, so they are retried next time
+            self._cache.put(key, policies)
+            return list(policies)
         except Exception as e:
             return [{"error": str(e)}]
     
-    def _mock_search(self, query: str) -> List[Dict]:
-        """Mock search for demo purposes."""
-        mock_policies = [
-            {
-                "id": "POL-001",
-                "title": "Currency Transaction Report (CTR) Requirements",
-                "content": "Financial institutions must file a CTR for each deposit, withdrawal, exchange of currency, or other payment or transfer that involves a transaction in currency of more than $10,000.",
-                "category": "BSA",
-                "regulation": "31 CFR 1010.311",
-                "relevance_score": 0.95
-            },
-            {
-                "id": "POL-002",
-                "title": "Suspicious Activity Report (SAR) Requirements",
-                "content": "Banks must report any suspicious transaction relevant to a possible violation of law or regulation. This includes any transaction conducted or attempted that involves funds derived from illegal activities.",
-                "category": "BSA",
-                "regulation": "31 CFR 1020.320",
-                "relevance_score": 0.90
-            },
-            {
-                "id": "POL-003",
-                "title": "Enhanced Due Diligence (EDD) Requirements",
-                "content": "Enhanced due diligence is required for high-risk customers, including PEPs, customers from high-risk jurisdictions, and those with complex ownership structures.",
-                "category": "AML",
-                "regulation": "31 CFR 1010.610",
-                "relevance_score": 0.85
-            }
-        ]
+    async def search_async(self, query: str, category: str = None, top: int = 5,
+                           full_content: bool = False,
+                           client: "AsyncSearchClient" = None) -> List[Dict]:
+        """
+        Async variant of search.
+        Uses the given open async client, or a short-lived one if none is given.
+        """
+        if not self.search_client:
+            return self._mock_search(query)
         
-        query_lower = query.lower()
-        matches = [p for p in mock_policies if query_lower in p["title"].lower() or 
-                   query_lower in p["content"].lower()]
+        key = (query, category, top, full_content)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
+        if client is None:
+            async with self._create_async_client() as client:
+                return await self.search_async(query, category, top, full_content, client)
         
-        return matches if matches else mock_policies[:2]
+        try:
+            results = await client.search(
+                **self._search_options(query, category, top, full_content)
+            )
+            
+            policies = [self._parse_policy(result) async for result in results]
+            
+            # Failed searches are not cached, so they are retried next time
+            self._cache.put(key, policies)
+            return list(policies)
+        except Exception as e:
+            return [{"error": str(e)}]
+    
+    def _search_options(self, query: str, category: str, top: int,
+                        full_content: bool) -> Dict:
+        """Keyword arguments for a policy search request."""
+        options = {
+            "search_text": query,
+            "filter": _category_filter(category) if category else None,
+            "top": top,
+            "include_total_count": True
+        }
+        if full_content:
+            options["select"] = self.SELECT_FIELDS + ["content"]
+        else:
+            # Plain-text excerpts of content instead of the whole field
+            options.update(
+                select=self.SELECT_FIELDS,
+                highlight_fields="content",
+                highlight_pre_tag="",
+                highlight_post_tag=""
+            )
+        return options
+    
+    def _create_async_client(self) -> "AsyncSearchClient":
+        """
+        Create an async client. Its HTTP session is bound to the running event
+        loop, so callers open one per batch with "async with".
+        """
+        return _search_sdk().AsyncSearchClient(
+            endpoint=self.endpoint,
+            index_name=self.INDEX_NAME,
+            credential=self.credential
+        )
+    
+    @classmethod
+    def _parse_policy(cls, result: Dict) -> Dict:
+        """Convert a search result into the searcher's policy format."""
+        content = result.get("content")
+        if content is None:
+            highlights = result.get("@search.highlights") or {}
+            content = cls.SNIPPET_SEPARATOR.join(highlights.get("content", []))
+        return {
+            "id": result.get("id"),
+            "title": result.get("title"),
+            "content": content,
+            "category": result.get("category"),
+            "regulation": result.get("regulation"),
+            "relevance_score": result.get("@search.score", 0)
+        }
+    
+    def _mock_search(self, query: str) -> List[Dict]:
+        """
+        Mock search for demo purposes.
+        Policies sharing any word with the query are ranked by the summed
+        IDF weight of the shared words, so multi-word queries match policies
+        that don't contain the exact phrase.
+        """
+        scores: Dict[int, float] = {}
+        for token in set(_tokenize(query)):
+            postings = _MOCK_POLICIES_BY_TOKEN.get(token)
+            if not postings:
+                continue
+            # Words found in fewer policies say more about which one is meant
+            weight = math.log(1 + len(_MOCK_POLICIES) / len(postings))
+            for i in postings:
+                scores[i] = scores.get(i, 0.0) + weight
+        
+        if not scores:
+            return _MOCK_POLICIES[:2]
+        return [_MOCK_POLICIES[i] for i in sorted(scores, key=lambda i: (-scores[i], i))]
+
+
+def initialize_all_indexes() -> List[Dict]:
+    """
+    Create or update the sanctions and policy indexes.
+    The two REST calls are independent, so they are issued concurrently and a
+    cold start waits for the slower one rather than both in turn. Returns
+    each searcher's create_index result, sanctions first.
+    """
+    searchers = (SanctionsSearcher(), PolicySearcher())
+    with ThreadPoolExecutor(max_workers=len(searchers)) as executor:
+        futures = [executor.submit(searcher.create_index) for searcher in searchers]
+        return [future.result() for future in futures]
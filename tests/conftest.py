@@ -0,0 +1,35 @@
+import pytest
+from unittest.mock import Mock
+
+
+AGENT_MODULES = ("agents.forensic_agent", "agents.legal_agent", "agents.report_agent")
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Mock LLM returned by get_llm in every agent module."""
+    llm = Mock()
+    for module in AGENT_MODULES:
+        monkeypatch.setattr(f"{module}.get_llm", lambda: llm)
+    return llm
+
+
+@pytest.fixture
+def forensic_agent(llm):
+    """ForensicAgent backed by the mock LLM."""
+    from agents.forensic_agent import ForensicAgent
+    return ForensicAgent()
+
+
+@pytest.fixture
+def legal_agent(llm):
+    """LegalAgent backed by the mock LLM, using its built-in sanctions list."""
+    from agents.legal_agent import LegalAgent
+    return LegalAgent()
+
+
+@pytest.fixture
+def report_agent(llm):
+    """ReportAgent backed by the mock LLM, without blob storage."""
+    from agents.report_agent import ReportAgent
+    return ReportAgent()